@@ -0,0 +1,225 @@
+"""
+Analysis pipeline shared by the Flask backend, the async server and the Streamlit app.
+A conversation is looked up in the semantic cache, compacted, analyzed in
+parallel windows first when it is long, and sent to the model through the
+response cache; the feedback is then stored for near-duplicate lookups.
+Each front end supplies only its model calls.
+"""
+
+import asyncio
+import contextvars
+import time
+
+import combined_analysis
+import compaction
+from metrics import RequestTimer, request_timer, using_timer
+from model_router import cache_model_name
+from prompt_builder import build_prompt
+from response_cache import cached_generate, cached_generate_async, cached_stream
+from semantic_cache import lookup_feedback, store_feedback
+from transcript_chunker import is_long_transcript, map_reduce_prompt
+
+
+def in_caller_context(fn):
+    """Wrap fn so every call runs in a copy of the current context.
+
+    Worker threads start with an empty context; this carries the caller's
+    call options (priority and deadline) and request timer over to them.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args):
+        return context.copy().run(fn, *args)
+    return run
+
+
+class AnalysisPipeline:
+    """Run analyses around one front end's model calls.
+
+    generate(prompt, analysis_type) returns response text, stream(prompt,
+    analysis_type) yields text chunks and generate_async(prompt,
+    analysis_type) is the coroutine variant for the event-loop server.
+    Responses are cached under cache_model_name(model_name).
+    """
+
+    def __init__(self, model_name, generate, stream=None, generate_async=None):
+        self.model_name = model_name
+        self.generate = generate
+        self.stream = stream
+        self.generate_async = generate_async
+
+    def build_prompt(self, conversation, analysis_type, methodology, use_cache=True):
+        """Return the final prompt for a conversation.
+
+        Long transcripts are analyzed in parallel windows first, and the
+        returned prompt merges the per-window feedback.
+        """
+        conversation = compaction.compact_for_prompt(conversation, analysis_type, methodology)
+        if not is_long_transcript(conversation):
+            return build_prompt(conversation, analysis_type, methodology)
+        return self._map_reduce(conversation, analysis_type, methodology, use_cache)
+
+    def _timed_prompt(self, timer, conversation, analysis_type, methodology, use_cache):
+        """Build the prompt, timing compaction and assembly as prompt_build and window analyses as map_reduce."""
+        with timer.stage('prompt_build'):
+            conversation = compaction.compact_for_prompt(conversation, analysis_type, methodology)
+            if not is_long_transcript(conversation):
+                return build_prompt(conversation, analysis_type, methodology)
+        with timer.stage('map_reduce'):
+            return self._map_reduce(conversation, analysis_type, methodology, use_cache)
+
+    def _map_reduce(self, conversation, analysis_type, methodology, use_cache):
+        model_name = cache_model_name(self.model_name)
+
+        def generate_window(prompt):
+            return cached_generate(prompt, model_name, lambda p: self.generate(p, analysis_type), use_cache=use_cache)
+
+        # Windows run in worker threads; their model calls are recorded on the caller's request
+        return map_reduce_prompt(conversation, analysis_type, methodology, in_caller_context(generate_window))
+
+    def feedback(self, conversation, analysis_type, methodology, use_cache=True):
+        """Return feedback on a conversation.
+
+        Responses are cached on the full prompt and model name, and
+        optionally on near-identical conversations; pass use_cache=False to
+        force a fresh model call.
+        """
+        model_name = cache_model_name(self.model_name)
+        with request_timer(analysis_type, methodology) as timer:
+            with timer.stage('semantic_lookup'):
+                feedback = lookup_feedback(conversation, analysis_type, methodology, model_name, use_cache=use_cache)
+            if feedback is not None:
+                timer.record_text('response', feedback)
+                return feedback
+
+            prompt = self._timed_prompt(timer, conversation, analysis_type, methodology, use_cache)
+            timer.record_text('prompt', prompt)
+
+            with timer.stage('generate'):
+                feedback = cached_generate(prompt, model_name, lambda p: self.generate(p, analysis_type),
+                                           use_cache=use_cache)
+            timer.record_text('response', feedback)
+            store_feedback(conversation, analysis_type, methodology, model_name, feedback)
+            return feedback
+
+    def feedback_combined(self, conversation, analysis_types, methodology, use_cache=True):
+        """Return ({analysis_type: feedback}, single_pass) from one model call.
+
+        single_pass is False when the types were analyzed separately because
+        the combined response could not be parsed or the transcript is long.
+        """
+        model_name = cache_model_name(self.model_name)
+        with request_timer('combined', methodology) as timer:
+            def generate(prompt):
+                timer.record_text('prompt', prompt)
+                return cached_generate(prompt, model_name, lambda p: self.generate(p, 'combined'), use_cache=use_cache)
+
+            # Fallback analyses run in worker threads, each recorded as its own request
+            def analyze_one(analysis_type):
+                with request_timer(analysis_type, methodology, separate=True):
+                    return self.feedback(conversation, analysis_type, methodology, use_cache=use_cache)
+
+            with timer.stage('generate'):
+                analyses, single_pass = combined_analysis.combined_feedback(
+                    conversation, analysis_types, methodology, generate, in_caller_context(analyze_one)
+                )
+            timer.record_text('response', "".join(analyses.values()))
+            return analyses, single_pass
+
+    def feedback_stream(self, conversation, analysis_type, methodology, use_cache=True):
+        """Yield feedback text chunks as the model generates them.
+
+        The request is timed like feedback(), with time spent waiting for
+        chunks recorded as model; the timings are recorded even if the
+        consumer stops reading early.
+        """
+        model_name = cache_model_name(self.model_name)
+        timer = RequestTimer(analysis_type, methodology)
+        start = time.perf_counter()
+        chunks = []
+        stream = None
+        try:
+            with using_timer(timer), timer.stage('semantic_lookup'):
+                feedback = lookup_feedback(conversation, analysis_type, methodology, model_name, use_cache=use_cache)
+            if feedback is not None:
+                # A near-duplicate hit arrives as one chunk, like an exact cache hit
+                timer.stages['first_chunk'] = time.perf_counter() - start
+                chunks.append(feedback)
+                yield feedback
+                return
+
+            with using_timer(timer):
+                prompt = self._timed_prompt(timer, conversation, analysis_type, methodology, use_cache)
+            timer.record_text('prompt', prompt)
+
+            stream = cached_stream(prompt, model_name, lambda p: self.stream(p, analysis_type), use_cache=use_cache)
+            while True:
+                # The timer is current only while waiting for a chunk, never across a yield
+                with using_timer(timer), timer.stage('model'):
+                    chunk = next(stream, None)
+                if chunk is None:
+                    break
+                if not chunks:
+                    timer.stages['first_chunk'] = time.perf_counter() - start
+                chunks.append(chunk)
+                yield chunk
+            store_feedback(conversation, analysis_type, methodology, model_name, "".join(chunks))
+        finally:
+            if stream is not None:
+                stream.close()
+            timer.stages['stream_total'] = time.perf_counter() - start
+            if chunks:
+                timer.record_text('response', "".join(chunks))
+            timer.finish()
+
+    async def feedback_async(self, conversation, analysis_type, methodology, use_cache=True):
+        """Async variant of feedback() that does not block the event loop."""
+        model_name = cache_model_name(self.model_name)
+        with request_timer(analysis_type, methodology) as timer:
+            with timer.stage('semantic_lookup'):
+                feedback = lookup_feedback(conversation, analysis_type, methodology, model_name, use_cache=use_cache)
+            if feedback is not None:
+                timer.record_text('response', feedback)
+                return feedback
+
+            with timer.stage('prompt_build'):
+                prompt_conversation = compaction.compact_for_prompt(conversation, analysis_type, methodology)
+                long_transcript = is_long_transcript(prompt_conversation)
+                if not long_transcript:
+                    prompt = build_prompt(prompt_conversation, analysis_type, methodology)
+            if long_transcript:
+                with timer.stage('map_reduce'):
+                    prompt = await asyncio.to_thread(
+                        self._map_reduce, prompt_conversation, analysis_type, methodology, use_cache
+                    )
+            timer.record_text('prompt', prompt)
+
+            with timer.stage('generate'):
+                feedback = await cached_generate_async(
+                    prompt, model_name, lambda p: self.generate_async(p, analysis_type), use_cache=use_cache
+                )
+            timer.record_text('response', feedback)
+            store_feedback(conversation, analysis_type, methodology, model_name, feedback)
+            return feedback
+
+    async def feedback_combined_async(self, conversation, analysis_types, methodology, use_cache=True):
+        """Async variant of feedback_combined(), with concurrent per-type fallback analyses."""
+        model_name = cache_model_name(self.model_name)
+        with request_timer('combined', methodology) as timer:
+            async def generate(prompt):
+                timer.record_text('prompt', prompt)
+                return await cached_generate_async(
+                    prompt, model_name, lambda p: self.generate_async(p, 'combined'), use_cache=use_cache
+                )
+
+            # Each fallback analysis runs as its own task and records its own request timings
+            async def analyze_one(analysis_type):
+                with request_timer(analysis_type, methodology, separate=True):
+                    return await self.feedback_async(conversation, analysis_type, methodology, use_cache=use_cache)
+
+            with timer.stage('generate'):
+                analyses, single_pass = await combined_analysis.combined_feedback_async(
+                    conversation, analysis_types, methodology, generate, analyze_one
+                )
+            timer.record_text('response', "".join(analyses.values()))
+            return analyses, single_pass
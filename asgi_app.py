@@ -0,0 +1,212 @@
+"""
+Async (ASGI) implementation of the AI Sales Coach analysis API.
+Serves the same / and /api/analyze contract as backend.py, but awaits model
+calls instead of holding a worker thread for each one. Run it with serve.py.
+"""
+
+import asyncio
+import os
+
+from dotenv import load_dotenv
+
+# Load environment variables before importing modules that read them
+load_dotenv()
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+from analysis_pipeline import AnalysisPipeline
+import combined_analysis
+import compaction
+import fast_analysis
+from metrics import render_metrics, request_timer, stage
+from model_registry import model_registry, prewarm_enabled
+from model_router import FAST_MODEL_CONFIG, model_router, routing_enabled
+from prompt_builder import check_analysis_options, normalize_analysis_types
+from response_cache import response_cache
+from semantic_cache import semantic_cache
+from scheduler import DeadlineExceededError, QueueFullError, scheduler
+from single_flight import single_flight
+
+# Gemini model config used for all analyses
+MODEL_CONFIG = 'default'
+MODEL_NAME = model_registry.model_name(MODEL_CONFIG)
+
+# Seconds before an analysis request is abandoned with a 504
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "120"))
+
+# Always add a Server-Timing header (otherwise only when the request sends X-Timing: 1)
+TIMING_HEADER = os.getenv("TIMING_HEADER", "0") == "1"
+
+
+async def generate_text_async(prompt, analysis_type="general"):
+    """Send a prompt to the model without blocking the event loop."""
+    if routing_enabled():
+        return await model_router.generate_async(prompt, analysis_type, MODEL_CONFIG, timeout=REQUEST_TIMEOUT)
+    model = model_registry.get(MODEL_CONFIG)
+    with stage('model'):
+        response = await scheduler.call_async(lambda: model.generate_content_async(prompt), timeout=REQUEST_TIMEOUT)
+    return response.text
+
+
+def generate_text(prompt, analysis_type="general"):
+    """Blocking model call, used for long-transcript windows run in threads."""
+    if routing_enabled():
+        return model_router.generate(prompt, analysis_type, MODEL_CONFIG, timeout=REQUEST_TIMEOUT)
+    model = model_registry.get(MODEL_CONFIG)
+    with stage('model'):
+        response = scheduler.call(lambda: model.generate_content(prompt), timeout=REQUEST_TIMEOUT)
+    return response.text
+
+
+# Semantic cache, compaction, map-reduce and response cache around this server's model calls
+pipeline = AnalysisPipeline(MODEL_NAME, generate_text, generate_async=generate_text_async)
+
+
+async def get_ai_feedback_async(conversation, analysis_type, methodology, use_cache=True):
+    """Get AI feedback on a sales conversation without blocking the event loop."""
+    return await pipeline.feedback_async(conversation, analysis_type, methodology, use_cache=use_cache)
+
+
+async def get_ai_feedback_combined_async(conversation, analysis_types, methodology, use_cache=True):
+    """Get feedback for several analysis types from one model call.
+
+    Returns ({analysis_type: feedback}, single_pass), falling back to
+    concurrent per-type analyses when the combined response cannot be parsed.
+    """
+    return await pipeline.feedback_combined_async(conversation, analysis_types, methodology, use_cache=use_cache)
+
+
+# Add a simple root endpoint for testing
+async def root(request):
+    return JSONResponse({"status": "API is running", "endpoints": ["/api/analyze", "/api/stats", "/metrics"]})
+
+
+# API endpoint for analyzing sales conversations
+async def analyze_conversation(request):
+    with request_timer() as timer:
+        with timer.stage('parse'):
+            try:
+                data = await request.json()
+            except ValueError:
+                data = None
+
+        if not data or 'conversation' not in data:
+            return JSONResponse({"error": "No conversation provided"}, status_code=400)
+
+        # Background jobs are served by the Flask backend only
+        if data.get('async'):
+            return JSONResponse(
+                {"error": "async jobs are not supported by this server; send the request without \"async\""},
+                status_code=400
+            )
+
+        conversation = data.get('conversation', '')
+        analysis_type = data.get('analysis_type', 'general')
+        methodology = data.get('methodology', 'none')
+        use_cache = not data.get('bypass_cache', False)
+        try:
+            check_analysis_options(analysis_type, methodology)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        timer.set_labels(analysis_type, methodology)
+
+        # Fast mode answers instantly from local heuristics without a model call
+        if data.get('mode') == 'fast':
+            with timer.stage('fast_analysis'):
+                metrics = fast_analysis.analyze(conversation, methodology)
+            response = JSONResponse({"feedback": fast_analysis.format_report(metrics), "metrics": metrics})
+            return add_timing_header(request, response, timer)
+
+        # Several analysis types are answered together in one model call
+        analysis_types = data.get('analysis_types')
+        if analysis_types is not None:
+            try:
+                if not isinstance(analysis_types, list) or not analysis_types:
+                    raise ValueError("analysis_types must be a non-empty list")
+                analysis_types = normalize_analysis_types(analysis_types)
+            except ValueError as e:
+                return JSONResponse({"error": str(e)}, status_code=400)
+            timer.set_labels('combined', methodology)
+
+        try:
+            if analysis_types is not None:
+                analyses, single_pass = await asyncio.wait_for(
+                    get_ai_feedback_combined_async(conversation, analysis_types, methodology, use_cache=use_cache),
+                    timeout=REQUEST_TIMEOUT
+                )
+                body = {
+                    "feedback": combined_analysis.format_combined_feedback(analyses),
+                    "analyses": analyses,
+                    "single_pass": single_pass
+                }
+            else:
+                feedback = await asyncio.wait_for(
+                    get_ai_feedback_async(conversation, analysis_type, methodology, use_cache=use_cache),
+                    timeout=REQUEST_TIMEOUT
+                )
+                body = {"feedback": feedback}
+            # Report what compaction saved on this request (PROMPT_COMPACTION=1)
+            if timer.tokens_saved is not None:
+                body["tokens_saved"] = timer.tokens_saved
+            with timer.stage('serialize'):
+                response = JSONResponse(body)
+            return add_timing_header(request, response, timer)
+        except asyncio.TimeoutError:
+            return JSONResponse({"error": f"Analysis timed out after {REQUEST_TIMEOUT:g}s"}, status_code=504)
+        except QueueFullError as e:
+            return JSONResponse({"error": str(e)}, status_code=503, headers={"Retry-After": "5"})
+        except DeadlineExceededError as e:
+            return JSONResponse({"error": str(e)}, status_code=504)
+        except Exception as e:
+            return JSONResponse({"error": str(e)}, status_code=500)
+
+
+def add_timing_header(request, response, timer):
+    """Attach per-stage timings as a Server-Timing header when requested."""
+    if TIMING_HEADER or request.headers.get('X-Timing') == '1':
+        response.headers['Server-Timing'] = timer.server_timing()
+    return response
+
+
+# Runtime statistics for the response cache, request coalescing and model call queue
+async def stats(request):
+    return JSONResponse({
+        "cache": response_cache.stats(),
+        "semantic_cache": semantic_cache.stats(),
+        "combined_analysis": combined_analysis.stats(),
+        "single_flight": single_flight.stats(),
+        "models": model_registry.stats(),
+        "scheduler": scheduler.stats(),
+        "compaction": compaction.stats(),
+        "routing": model_router.stats()
+    })
+
+
+# Prometheus metrics for per-stage latency and prompt/response sizes
+async def prometheus_metrics(request):
+    return PlainTextResponse(render_metrics(), media_type='text/plain; version=0.0.4')
+
+
+# Create (and optionally pre-warm) the model client when a worker starts
+async def startup():
+    if prewarm_enabled():
+        configs = [MODEL_CONFIG, FAST_MODEL_CONFIG] if routing_enabled() else [MODEL_CONFIG]
+        await asyncio.to_thread(model_registry.warm, configs)
+    else:
+        model_registry.get(MODEL_CONFIG)
+
+
+app = Starlette(
+    routes=[
+        Route('/', root),
+        Route('/api/analyze', analyze_conversation, methods=['POST']),
+        Route('/api/stats', stats),
+        Route('/metrics', prometheus_metrics)
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])],
+    on_startup=[startup]
+)
@@ -0,0 +1,63 @@
+"""
+Compare batch analysis throughput against the one-at-a-time loop.
+Runs entirely against the local fake model, so no API quota is used.
+
+Usage:
+    python benchmarks/bench_batch.py --items 50 --latency 0.2 --concurrency 8
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ['USE_FAKE_MODEL'] = '1'
+# The fake model has no quota to respect
+os.environ.setdefault('MODEL_RATE_LIMIT', '0')
+
+import backend  # noqa: E402
+from example_conversations import get_example_conversation  # noqa: E402
+
+
+def make_items(count):
+    """Build distinct batch items so the response cache never hits."""
+    examples = ["cold_call", "discovery", "objection"]
+    return [
+        {
+            "conversation": get_example_conversation(examples[i % len(examples)]) + f"\nCall #{i}",
+            "analysis_type": "general",
+            "methodology": "none"
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.2, help="Fake model latency in seconds")
+    parser.add_argument('--concurrency', type=int, default=backend.BATCH_MAX_WORKERS)
+    args = parser.parse_args()
+
+    os.environ['FAKE_MODEL_LATENCY'] = str(args.latency)
+    items = make_items(args.items)
+
+    start = time.perf_counter()
+    for item in items:
+        backend.get_ai_feedback(item['conversation'], item['analysis_type'], item['methodology'], use_cache=False)
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = backend.analyze_batch_items(items, args.concurrency, use_cache=False)
+    batched = time.perf_counter() - start
+    errors = sum(1 for r in results if 'error' in r)
+
+    print(f"Items: {args.items}, fake latency: {args.latency}s, concurrency: {args.concurrency}")
+    print(f"Sequential loop: {sequential:.2f}s ({args.items / sequential:.1f} items/s)")
+    print(f"Batch endpoint:  {batched:.2f}s ({args.items / batched:.1f} items/s), errors: {errors}")
+    print(f"Speedup: {sequential / batched:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Compare a full five-type report built from separate per-type calls with one
+combined (single-pass) call: estimated input tokens and wall time, using the
+fake model.
+
+Usage:
+    python benchmarks/bench_combined_analysis.py --latency 0.5 --methodology SPIN
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import combined_analysis  # noqa: E402
+from example_conversations import get_example_conversation  # noqa: E402
+from fake_model import FakeGenerativeModel  # noqa: E402
+from prompt_builder import ANALYSIS_TYPES, build_combined_prompt, build_prompt, estimate_tokens  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark combined multi-type analysis")
+    parser.add_argument('--latency', type=float, default=0.5, help="Fake model latency per call in seconds")
+    parser.add_argument('--methodology', default='SPIN')
+    parser.add_argument('--example', default='discovery')
+    args = parser.parse_args()
+
+    model = FakeGenerativeModel(latency=args.latency)
+    conversation = get_example_conversation(args.example)
+
+    def generate(prompt):
+        return model.generate_content(prompt).text
+
+    def analyze_one(analysis_type):
+        return generate(build_prompt(conversation, analysis_type, args.methodology))
+
+    separate_tokens = sum(estimate_tokens(build_prompt(conversation, t, args.methodology)) for t in ANALYSIS_TYPES)
+    start = time.perf_counter()
+    for analysis_type in ANALYSIS_TYPES:
+        analyze_one(analysis_type)
+    sequential = time.perf_counter() - start
+
+    combined_tokens = estimate_tokens(build_combined_prompt(conversation, ANALYSIS_TYPES, args.methodology))
+    start = time.perf_counter()
+    analyses, single_pass = combined_analysis.combined_feedback(
+        conversation, ANALYSIS_TYPES, args.methodology, generate, analyze_one
+    )
+    combined = time.perf_counter() - start
+
+    print(f"Separate calls: {len(ANALYSIS_TYPES)} calls, ~{separate_tokens} input tokens, {sequential:.2f}s sequential")
+    print(f"Combined call:  1 call, ~{combined_tokens} input tokens, {combined:.2f}s "
+          f"(single pass: {single_pass}, {len(analyses)} analyses)")
+    print(f"Input tokens reduced {separate_tokens / combined_tokens:.1f}x, wall time {sequential / combined:.1f}x")
+    print("Note: the fake model's latency ignores output length; a real combined response is longer than one per-type answer.")
+
+
+if __name__ == '__main__':
+    main()
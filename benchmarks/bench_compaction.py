@@ -0,0 +1,115 @@
+"""
+Measure prompt compaction on the bundled example conversations: input tokens
+per prompt with and without PROMPT_COMPACTION, the local cost of compacting,
+and end-to-end get_ai_feedback latency with a fake model whose response time
+grows with prompt length.
+
+Each example is measured as bundled and as a "noisy export" copy with the
+indentation, blank lines and backchannel turns typical of exported call
+transcripts.
+
+Usage:
+    python benchmarks/bench_compaction.py --latency 0.2 --input-latency 0.4 --requests 3
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from example_conversations import get_example_conversation  # noqa: E402
+
+EXAMPLE_NAMES = ("cold_call", "discovery", "objection")
+METHODOLOGIES = ("none", "SPIN", "BANT", "CHALLENGER", "SOLUTION")
+BACKCHANNELS = ("Mm-hmm.", "Okay.", "Yeah.", "Right.", "Uh-huh.", "Got it.")
+
+
+def noisy_export(conversation, rng):
+    """Return a copy with exported-transcript noise: padding, blank lines and backchannel turns."""
+    lines = []
+    for line in conversation.strip().splitlines():
+        speaker, _, text = line.partition(":")
+        lines.append(f"    {speaker}:   {text.strip().replace('. ', '.  ')}\n")
+        if not text.strip().endswith("?") and rng.random() < 0.7:
+            listener = "Customer" if speaker.strip() == "Salesperson" else "Salesperson"
+            lines.append(f"    {listener}:  {rng.choice(BACKCHANNELS)}\n")
+    return "\n".join(lines)
+
+
+def set_compaction(enabled):
+    # PROMPT_COMPACTION is read once at import, so switch the module flag
+    import prompt_builder
+    prompt_builder.PROMPT_COMPACTION = enabled
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prompt compaction")
+    parser.add_argument('--latency', type=float, default=0.2, help="Fake model base latency in seconds")
+    parser.add_argument('--input-latency', type=float, default=0.4,
+                        help="Extra fake model latency in seconds per 1,000 prompt tokens")
+    parser.add_argument('--requests', type=int, default=3, help="Timed requests per prompt variant")
+    args = parser.parse_args()
+
+    os.environ.update({
+        "USE_FAKE_MODEL": "1",
+        "FAKE_MODEL_LATENCY": str(args.latency),
+        "FAKE_MODEL_INPUT_LATENCY": str(args.input_latency)
+    })
+    os.environ.setdefault("MODEL_RATE_LIMIT", "0")
+
+    import backend
+    import compaction
+    from prompt_builder import ANALYSIS_TYPES, estimate_tokens
+
+    rng = random.Random(1)
+    corpora = {
+        "bundled": {name: get_example_conversation(name) for name in EXAMPLE_NAMES},
+        "noisy export": {name: noisy_export(get_example_conversation(name), rng) for name in EXAMPLE_NAMES}
+    }
+
+    print(f"Input tokens per prompt over {len(EXAMPLE_NAMES)} examples x {len(ANALYSIS_TYPES)} analysis types "
+          f"x {len(METHODOLOGIES)} methodologies (estimated):")
+    for corpus, conversations in corpora.items():
+        totals = {False: 0, True: 0}
+        compact_seconds = 0.0
+        prompts = 0
+        for conversation in conversations.values():
+            for analysis_type in ANALYSIS_TYPES:
+                for methodology in METHODOLOGIES:
+                    for enabled in (False, True):
+                        set_compaction(enabled)
+                        start = time.perf_counter()
+                        prompt = backend.build_analysis_prompt(conversation, analysis_type, methodology)
+                        if enabled:
+                            compact_seconds += time.perf_counter() - start
+                        totals[enabled] += estimate_tokens(prompt)
+                    prompts += 1
+        saved = 1 - totals[True] / totals[False]
+        print(f"  {corpus:<13} full {totals[False] / prompts:6.0f}  compacted {totals[True] / prompts:6.0f}  "
+              f"saved {saved:.0%}  (compaction + prompt build {compact_seconds / prompts * 1e6:.0f}us)")
+
+    print(f"\nget_ai_feedback latency, fake model {args.latency:g}s + {args.input_latency:g}s per 1k prompt tokens:")
+    for corpus, conversations in corpora.items():
+        totals = {False: 0.0, True: 0.0}
+        for conversation in conversations.values():
+            for enabled in (False, True):
+                set_compaction(enabled)
+                for _ in range(args.requests):
+                    start = time.perf_counter()
+                    backend.get_ai_feedback(conversation, "objections", "SPIN", use_cache=False)
+                    totals[enabled] += time.perf_counter() - start
+        count = len(conversations) * args.requests
+        print(f"  {corpus:<13} full {totals[False] / count * 1000:6.1f}ms  "
+              f"compacted {totals[True] / count * 1000:6.1f}ms  "
+              f"reduction {1 - totals[True] / totals[False]:.0%}")
+
+    stats = compaction.stats()
+    print(f"\nCompaction totals: {stats['tokens_saved']} tokens saved over {stats['requests']} requests, "
+          f"{stats['turns_dropped']} turns dropped")
+
+
+if __name__ == '__main__':
+    main()
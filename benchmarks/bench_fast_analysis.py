@@ -0,0 +1,44 @@
+"""
+Measure fast (local heuristic) analysis throughput in transcripts per second.
+
+Usage:
+    python benchmarks/bench_fast_analysis.py --transcripts 5000 --methodology SPIN
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import fast_analysis  # noqa: E402
+from example_conversations import get_example_conversation  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure fast analysis throughput")
+    parser.add_argument('--transcripts', type=int, default=5000)
+    parser.add_argument('--methodology', default='SPIN')
+    args = parser.parse_args()
+
+    examples = [get_example_conversation(name) for name in ("cold_call", "discovery", "objection")]
+    transcripts = [examples[i % len(examples)] for i in range(args.transcripts)]
+    total_bytes = sum(len(t.encode("utf-8")) for t in transcripts)
+
+    start = time.perf_counter()
+    results = [fast_analysis.analyze(t, args.methodology) for t in transcripts]
+    elapsed = time.perf_counter() - start
+    flagged = sum(1 for metrics in results if metrics["needs_review"])
+
+    print(f"Transcripts: {args.transcripts} ({total_bytes / 1e6:.1f} MB), methodology: {args.methodology}")
+    print(f"Elapsed: {elapsed:.2f}s, {args.transcripts / elapsed:,.0f} transcripts/s, "
+          f"{elapsed / args.transcripts * 1e6:.0f}us per transcript")
+    print(f"Flagged for full AI analysis: {flagged} of {args.transcripts} ({flagged / args.transcripts:.0%}, "
+          f"severity >= {fast_analysis.REVIEW_SEVERITY})")
+    for example, metrics in zip(("cold_call", "discovery", "objection"), results):
+        print(f"  {example:<10} severity {metrics['severity']}  flags: {', '.join(metrics['flags']) or 'none'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Compare model routing against sending every analysis to the large model.
+Runs get_ai_feedback on the bundled example conversations with the fake
+model, once with rules that always pick the large model and once with the
+routing rules, and reports latency percentiles, estimated cost per request,
+escalations and hedges.
+
+The fake fast model answers in FAKE_MODEL_FAST_FACTOR of the large model's
+latency, and --weak-rate of its answers are weak enough to be escalated.
+
+Usage:
+    python benchmarks/bench_model_router.py --latency 0.2 --weak-rate 0.2 --requests 30
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from example_conversations import get_example_conversation  # noqa: E402
+
+EXAMPLE_NAMES = ("cold_call", "discovery", "objection")
+ANALYSIS_TYPES = ("general", "objections", "closing", "rapport", "pitch")
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def run(backend, router, requests, label):
+    """Time requests analyses through router and return sorted latencies in ms."""
+    backend.model_router = router
+    latencies = []
+    for i in range(requests):
+        name = EXAMPLE_NAMES[i % len(EXAMPLE_NAMES)]
+        conversation = f"{get_example_conversation(name).strip()}\nSalesperson: For my notes, this is {label} call {i}."
+        start = time.perf_counter()
+        backend.get_ai_feedback(conversation, ANALYSIS_TYPES[i % len(ANALYSIS_TYPES)], "SPIN", use_cache=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fast-model routing with escalation and hedging")
+    parser.add_argument('--latency', type=float, default=0.2, help="Typical large fake model latency in seconds")
+    parser.add_argument('--fast-factor', type=float, default=0.3, help="Fast model latency as a fraction of the large model's")
+    parser.add_argument('--weak-rate', type=float, default=0.2, help="Fraction of fast answers that get escalated")
+    parser.add_argument('--hedge-after', type=float, default=None,
+                        help="Seconds before a slow call is hedged (default: the routing rules)")
+    parser.add_argument('--requests', type=int, default=30, help="Analyses per configuration")
+    args = parser.parse_args()
+
+    os.environ.update({
+        "USE_FAKE_MODEL": "1",
+        "MODEL_ROUTING": "1",
+        "FAKE_MODEL_LATENCY": str(args.latency),
+        "FAKE_MODEL_LATENCY_DIST": "lognormal",
+        "FAKE_MODEL_SEED": "1",
+        "FAKE_MODEL_FAST_FACTOR": str(args.fast_factor),
+        "FAKE_MODEL_WEAK_RATE": str(args.weak_rate),
+        "SEMANTIC_CACHE": "0"
+    })
+    os.environ.setdefault("MODEL_RATE_LIMIT", "0")
+
+    import backend
+    from model_router import ModelRouter, ROUTING_RULES, model_router
+
+    rules = {t: dict(rule) for t, rule in ROUTING_RULES.items()}
+    if args.hedge_after is not None:
+        for analysis_type in ANALYSIS_TYPES:
+            rules[analysis_type]["hedge_after"] = args.hedge_after
+    # The large-only baseline goes through a router whose rules never pick the fast model,
+    # so both runs are accounted the same way
+    routers = {
+        "large only": ModelRouter({t: {"fast_max_tokens": 0, "hedge_after": 0} for t in ANALYSIS_TYPES},
+                                  prices=model_router.prices),
+        "routed": ModelRouter(rules, prices=model_router.prices)
+    }
+
+    print(f"{args.requests} analyses each, large model ~{args.latency:g}s (lognormal), "
+          f"fast model x{args.fast_factor:g}, {args.weak_rate:.0%} weak fast answers:")
+    for label, router in routers.items():
+        latencies = run(backend, router, args.requests, label)
+        cost = sum(model["cost_usd"] for model in router.stats()["models"].values())
+        print(f"  {label:<11} p50 {percentile(latencies, 0.5):6.1f}ms  p95 {percentile(latencies, 0.95):6.1f}ms  "
+              f"cost/request ${cost / args.requests:.6f}")
+
+    stats = routers["routed"].stats()
+    print(f"\nRouting: {stats['routed']['fast']} to the fast model, {stats['routed']['large']} to the large model; "
+          f"escalations {stats['escalations']}; hedges {stats['hedges']} (won by the backup: {stats['hedge_wins']})")
+    for name, model in stats["models"].items():
+        print(f"  {name:<17} calls {model['calls']:4d}  p50 {model['p50_ms']:6.1f}ms  p95 {model['p95_ms']:6.1f}ms  "
+              f"cost ${model['cost_usd']:.6f}")
+
+
+if __name__ == '__main__':
+    main()
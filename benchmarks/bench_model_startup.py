@@ -0,0 +1,98 @@
+"""
+Measure per-request model setup cost, cold versus warm requests, and Streamlit
+per-rerun overhead.
+
+    construction   genai.GenerativeModel() per request versus model_registry.get()
+    requests       first (cold) versus later (warm) request latency; needs --live
+                   and a GOOGLE_API_KEY, otherwise the fake model is used
+    streamlit      time of the first run and later reruns of app.py, using
+                   Streamlit's AppTest with the fake model
+
+Usage:
+    python benchmarks/bench_model_startup.py --iterations 1000
+    python benchmarks/bench_model_startup.py --live --requests 5
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+def bench_construction(iterations):
+    import google.generativeai as genai
+    from model_registry import model_registry
+
+    name = model_registry.model_name("default")
+    start = time.perf_counter()
+    for _ in range(iterations):
+        genai.GenerativeModel(name)
+    per_request = (time.perf_counter() - start) / iterations
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        model_registry.get("default")
+    registry = (time.perf_counter() - start) / iterations
+
+    print(f"construction   new client per request: {per_request * 1e6:.1f}us, "
+          f"registry lookup: {registry * 1e6:.2f}us")
+
+
+def bench_requests(count):
+    from model_registry import model_registry
+
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        model_registry.get("default").generate_content("Reply with the single word: ok")
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    warm = sorted(latencies[1:])
+    warm_median = warm[len(warm) // 2] if warm else 0.0
+    print(f"requests       cold: {latencies[0]:.1f}ms, warm median: {warm_median:.1f}ms")
+
+
+def bench_streamlit(reruns):
+    from streamlit.testing.v1 import AppTest
+
+    app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app.py')
+    app = AppTest.from_file(app_path, default_timeout=30)
+
+    start = time.perf_counter()
+    app.run()
+    first = (time.perf_counter() - start) * 1000
+
+    # A fresh AppTest per rerun: AppTest 1.28 cannot replay widgets that use
+    # format_func, and process-wide caches stay warm across instances anyway
+    timings = []
+    for _ in range(reruns):
+        app = AppTest.from_file(app_path, default_timeout=30)
+        start = time.perf_counter()
+        app.run()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    print(f"streamlit      first run: {first:.1f}ms, rerun median: {timings[len(timings) // 2]:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure model setup and rerun overhead")
+    parser.add_argument('--iterations', type=int, default=1000, help="Client constructions to time")
+    parser.add_argument('--requests', type=int, default=5, help="Model requests to time")
+    parser.add_argument('--reruns', type=int, default=20, help="Streamlit reruns to time")
+    parser.add_argument('--live', action='store_true', help="Call the real Gemini API for request timings")
+    args = parser.parse_args()
+
+    if not args.live:
+        os.environ['USE_FAKE_MODEL'] = '1'
+        os.environ.setdefault('MODEL_RATE_LIMIT', '0')
+        os.environ.setdefault('FAKE_MODEL_LATENCY', '0.05')
+
+    bench_construction(args.iterations)
+    bench_requests(args.requests)
+    bench_streamlit(args.reruns)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Measure per-request prompt assembly cost before and after prompt_builder.
+The "before" path is a copy of the original per-request code that rebuilt the
+system prompt with += and re-created the analysis_prompts dict on every call.
+
+Usage:
+    python benchmarks/bench_prompt_builder.py --iterations 100000
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from example_conversations import DISCOVERY_CALL_EXAMPLE  # noqa: E402
+from prompt_builder import build_prompt  # noqa: E402
+from sales_methodologies import METHODOLOGIES  # noqa: E402
+
+
+def legacy_build_prompt(conversation, analysis_type, methodology):
+    """Original per-request prompt assembly."""
+    analysis_prompts = {
+        "general": "Analyze this sales conversation and provide general feedback on effectiveness, engagement, and areas of improvement. Include 3-5 specific recommendations.",
+        "objections": "Analyze this sales conversation and identify objections raised by the customer. Provide specific strategies on how to better handle these objections. Include examples of improved responses.",
+        "closing": "Analyze this sales conversation and provide feedback on the closing techniques used. Suggest improvements for better conversion. Include specific examples of stronger closing approaches.",
+        "rapport": "Analyze this sales conversation and evaluate rapport building. Suggest ways to better connect with the customer. Provide examples of questions or statements that would improve relationship building.",
+        "pitch": "Analyze this sales conversation and evaluate the sales pitch. Provide feedback on value proposition and messaging. Include specific examples of how to better communicate value."
+    }
+
+    system_prompt = """
+    You are an expert AI Sales Coach with deep knowledge of sales methodologies, techniques, and best practices.
+    You analyze sales conversations and provide specific, actionable feedback to help sales professionals improve.
+    Focus on being constructive and specific, providing examples of better approaches where possible.
+    Format your response with clear headers and bullet points for readability.
+    """
+
+    if methodology != 'none' and methodology in METHODOLOGIES:
+        method_info = METHODOLOGIES[methodology]
+        system_prompt += f"\n\nIncorporate principles from the {method_info['name']} methodology in your analysis:"
+        system_prompt += f"\n- Description: {method_info['description']}"
+
+        if 'components' in method_info:
+            system_prompt += "\n- Key Components:"
+            for component, desc in method_info['components'].items():
+                system_prompt += f"\n  - {component}: {desc}"
+
+        if 'key_principles' in method_info:
+            system_prompt += "\n- Key Principles:"
+            for principle in method_info['key_principles']:
+                system_prompt += f"\n  - {principle}"
+
+    return system_prompt + "\n\n" + analysis_prompts.get(analysis_type, analysis_prompts["general"]) + "\n\n" + conversation
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=100000)
+    args = parser.parse_args()
+
+    cases = [("general", "none"), ("objections", "SPIN"), ("closing", "CHALLENGER"), ("pitch", "SOLUTION")]
+    for analysis_type, methodology in cases:
+        assert legacy_build_prompt(DISCOVERY_CALL_EXAMPLE, analysis_type, methodology) == \
+            build_prompt(DISCOVERY_CALL_EXAMPLE, analysis_type, methodology)
+
+    print(f"{'case':<24}{'before (us)':>14}{'after (us)':>14}{'speedup':>10}")
+    for analysis_type, methodology in cases:
+        before = timeit.timeit(
+            lambda: legacy_build_prompt(DISCOVERY_CALL_EXAMPLE, analysis_type, methodology),
+            number=args.iterations
+        )
+        after = timeit.timeit(
+            lambda: build_prompt(DISCOVERY_CALL_EXAMPLE, analysis_type, methodology),
+            number=args.iterations
+        )
+        per_before = before / args.iterations * 1e6
+        per_after = after / args.iterations * 1e6
+        label = f"{analysis_type}/{methodology}"
+        print(f"{label:<24}{per_before:>14.2f}{per_after:>14.2f}{per_before / per_after:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Exercise the model call scheduler against the fake model with injected 429s.
+
+Runs a batch backlog and a trickle of interactive calls through one scheduler
+and reports success rate, retries and the latency of each priority, next to
+the same workload sent straight to the model without retries.
+
+Usage:
+    python benchmarks/bench_scheduler.py --batch 200 --interactive 20 --error-rate 0.2 --rate 50
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fake_model import FakeGenerativeModel  # noqa: E402
+from scheduler import BATCH, INTERACTIVE, ModelCallScheduler  # noqa: E402
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    try:
+        fn()
+        return time.perf_counter() - start, None
+    except Exception as e:
+        return time.perf_counter() - start, e
+
+
+def run_direct(model, calls, concurrency):
+    """Send every call straight to the model: no pacing, no retries."""
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda _: timed(lambda: model.generate_content("prompt")), range(calls)))
+    return sum(1 for _, error in results if error is None)
+
+
+def run_scheduled(model, args):
+    scheduler = ModelCallScheduler(
+        rate_per_second=args.rate, burst=args.burst, max_queue=args.batch + args.interactive,
+        workers=args.concurrency, max_retries=args.max_retries, base_backoff=0.05, max_backoff=1.0
+    )
+
+    def call():
+        model.generate_content("prompt")
+        return time.perf_counter()
+
+    def submit(priority):
+        return time.perf_counter(), scheduler.submit(call, priority=priority)
+
+    # Queue the whole batch backlog first, then interactive calls arrive while it drains
+    batch = [submit(BATCH) for _ in range(args.batch)]
+    interactive = []
+    for _ in range(args.interactive):
+        time.sleep(args.interactive_interval)
+        interactive.append(submit(INTERACTIVE))
+
+    def collect(entries):
+        latencies, failures = [], 0
+        for start, future in entries:
+            try:
+                latencies.append(future.result() - start)
+            except Exception:
+                failures += 1
+        return latencies, failures
+
+    interactive_latencies, interactive_failures = collect(interactive)
+    batch_latencies, batch_failures = collect(batch)
+    return scheduler.stats(), interactive_latencies, interactive_failures, batch_latencies, batch_failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the model call scheduler with injected 429s")
+    parser.add_argument('--batch', type=int, default=200)
+    parser.add_argument('--interactive', type=int, default=20)
+    parser.add_argument('--interactive-interval', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.2)
+    parser.add_argument('--latency', type=float, default=0.02, help="Fake model latency in seconds")
+    parser.add_argument('--rate', type=float, default=50.0, help="Token bucket rate (calls/s)")
+    parser.add_argument('--burst', type=float, default=10)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--max-retries', type=int, default=6)
+    args = parser.parse_args()
+
+    model = FakeGenerativeModel(latency=args.latency)
+    model.error_rate = args.error_rate
+    total = args.batch + args.interactive
+
+    succeeded = run_direct(model, total, args.concurrency)
+    print(f"Direct (no scheduler): {succeeded}/{total} succeeded ({succeeded / total:.0%})")
+
+    start = time.perf_counter()
+    stats, interactive, interactive_failures, batch, batch_failures = run_scheduled(model, args)
+    elapsed = time.perf_counter() - start
+    succeeded = total - interactive_failures - batch_failures
+    print(f"Scheduled: {succeeded}/{total} succeeded ({succeeded / total:.0%}) in {elapsed:.2f}s, "
+          f"{stats['retries']} retries, max queue depth {stats['max_queue_depth_seen']}")
+    print(f"  interactive p50 {percentile(interactive, 0.5) * 1000:.0f}ms, "
+          f"p95 {percentile(interactive, 0.95) * 1000:.0f}ms")
+    print(f"  batch       p50 {percentile(batch, 0.5) * 1000:.0f}ms, "
+          f"p95 {percentile(batch, 0.95) * 1000:.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,296 @@
+"""
+Reproducible benchmark suite that runs against the fake model, so no API quota is used.
+Drives backend.get_ai_feedback, the Flask /api/analyze route and the
+Streamlit app's analyze_sales_conversation at several concurrency levels and
+transcript sizes. The fake model replays recorded or synthetic responses with
+a chosen latency distribution. Results are written as JSON to compare across
+commits: throughput, latency percentiles, peak RSS and import/startup time.
+
+Usage:
+    python benchmarks/bench_suite.py --output results.json
+    python benchmarks/bench_suite.py --distribution lognormal --concurrency 1 8 32 --sizes small large
+    python benchmarks/bench_suite.py --output new.json --compare results.json
+    python benchmarks/bench_suite.py --record recorded.jsonl    # one live call per example, needs GOOGLE_API_KEY
+    python benchmarks/bench_suite.py --responses recorded.jsonl
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from example_conversations import get_example_conversation  # noqa: E402
+
+EXAMPLE_NAMES = ("cold_call", "discovery", "objection")
+
+# Example calls joined per transcript; "large" is long enough to be analyzed in windows
+SIZES = {"small": 1, "medium": 8, "large": 64}
+
+TARGETS = ("get_ai_feedback", "flask", "streamlit")
+
+# Run in a fresh interpreter to time imports and the first request
+STARTUP_SCRIPTS = {
+    "backend": (
+        "import json, time\n"
+        "start = time.perf_counter()\n"
+        "import backend\n"
+        "imported = time.perf_counter()\n"
+        "backend.app.test_client().post('/api/analyze', json={'conversation': 'Salesperson: Hi.', "
+        "'analysis_type': 'general', 'bypass_cache': True})\n"
+        "print(json.dumps([imported - start, time.perf_counter() - imported]))\n"
+    ),
+    "streamlit_app": (
+        "import json, time\n"
+        "start = time.perf_counter()\n"
+        "import app\n"
+        "imported = time.perf_counter()\n"
+        "app.analyze_sales_conversation('Salesperson: Hi.', 'general', use_cache=False)\n"
+        "print(json.dumps([imported - start, time.perf_counter() - imported]))\n"
+    )
+}
+
+
+def build_conversation(size, reference):
+    """Return a transcript of SIZES[size] example calls, made unique by reference.
+
+    Every example gets a reference line so no two requests (or windows of a
+    large transcript) share a prompt, and each costs full model calls.
+    """
+    parts = []
+    for i in range(SIZES[size]):
+        example = get_example_conversation(EXAMPLE_NAMES[i % len(EXAMPLE_NAMES)]).strip()
+        parts.append(f"{example}\nSalesperson: For my notes, this is call {reference}, part {i + 1}.")
+    return "\n".join(parts)
+
+
+def peak_rss_mb():
+    """Return the peak resident set size of this process so far, or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def make_target(name):
+    """Return fn(conversation) that runs one analysis through the named entry point."""
+    if name == "get_ai_feedback":
+        import backend
+        return lambda conversation: backend.get_ai_feedback(conversation, "general", "SPIN", use_cache=False)
+
+    if name == "flask":
+        import backend
+        local = threading.local()
+
+        def post(conversation):
+            if not hasattr(local, "client"):
+                local.client = backend.app.test_client()
+            response = local.client.post('/api/analyze', json={
+                "conversation": conversation,
+                "analysis_type": "general",
+                "methodology": "SPIN",
+                "bypass_cache": True
+            })
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP {response.status_code}")
+            return response.get_json()["feedback"]
+        return post
+
+    import app
+    return lambda conversation: app.analyze_sales_conversation(conversation, "general", "SPIN", use_cache=False)
+
+
+def run_scenario(target, size, concurrency, requests):
+    from scheduler import scheduler
+
+    fn = make_target(target)
+    conversations = [build_conversation(size, f"{target}-{size}-{concurrency}-{i}")
+                     for i in range(requests)]
+    # One warm-up request so lazy setup is not counted
+    fn(build_conversation(size, f"{target}-{size}-{concurrency}-warmup"))
+
+    def timed(conversation):
+        start = time.perf_counter()
+        try:
+            fn(conversation)
+            return True, time.perf_counter() - start
+        except Exception:
+            return False, time.perf_counter() - start
+
+    calls_before = scheduler.stats()["completed"]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed, conversations))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency * 1000 for ok, latency in results if ok)
+    return {
+        "target": target,
+        "size": size,
+        "concurrency": concurrency,
+        "requests": requests,
+        "transcript_chars": len(conversations[0]),
+        "throughput_rps": round(requests / elapsed, 2),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50), 1),
+            "p90": round(percentile(latencies, 0.90), 1),
+            "p95": round(percentile(latencies, 0.95), 1),
+            "p99": round(percentile(latencies, 0.99), 1),
+            "max": round(latencies[-1], 1) if latencies else 0.0
+        },
+        "errors": sum(1 for ok, _ in results if not ok),
+        "model_calls": scheduler.stats()["completed"] - calls_before,
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+def measure_startup(runs):
+    """Return the median import time and first-request time per entry point, each in a fresh interpreter."""
+    results = {}
+    for name, script in STARTUP_SCRIPTS.items():
+        samples = []
+        for _ in range(runs):
+            output = subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=os.environ,
+                                    capture_output=True, text=True, check=True).stdout
+            samples.append(json.loads(output.strip().splitlines()[-1]))
+        imports = sorted(sample[0] * 1000 for sample in samples)
+        firsts = sorted(sample[1] * 1000 for sample in samples)
+        results[name] = {
+            "import_ms": round(imports[len(imports) // 2], 1),
+            "first_request_ms": round(firsts[len(firsts) // 2], 1)
+        }
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def record_responses(path):
+    """Record one live response per example conversation and analysis type for later replay."""
+    from fake_model import prompt_key
+    from model_registry import model_registry
+    from prompt_builder import ANALYSIS_TYPES, build_prompt
+
+    model = model_registry.get("default")
+    with open(path, "w", encoding="utf-8") as f:
+        for name in EXAMPLE_NAMES:
+            for analysis_type in ANALYSIS_TYPES:
+                prompt = build_prompt(get_example_conversation(name), analysis_type, None)
+                text = model.generate_content(prompt).text
+                f.write(json.dumps({"prompt_key": prompt_key(prompt), "example": name,
+                                    "analysis_type": analysis_type, "text": text}) + "\n")
+                print(f"Recorded {name}/{analysis_type}")
+
+
+def compare(results, baseline_path):
+    """Print throughput and p95 changes against an earlier results file."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    previous = {(s["target"], s["size"], s["concurrency"]): s for s in baseline["scenarios"]}
+    print(f"\nCompared with {baseline.get('commit') or baseline_path}:", file=sys.stderr)
+    for scenario in results["scenarios"]:
+        old = previous.get((scenario["target"], scenario["size"], scenario["concurrency"]))
+        if old is None:
+            continue
+        throughput = (scenario["throughput_rps"] / old["throughput_rps"] - 1) * 100 if old["throughput_rps"] else 0.0
+        p95 = (scenario["latency_ms"]["p95"] / old["latency_ms"]["p95"] - 1) * 100 if old["latency_ms"]["p95"] else 0.0
+        print(f"  {scenario['target']:<16} {scenario['size']:<7} x{scenario['concurrency']:<4} "
+              f"throughput {throughput:+.1f}%  p95 {p95:+.1f}%", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the fake-model benchmark suite")
+    parser.add_argument('--targets', nargs='+', default=list(TARGETS), choices=TARGETS)
+    parser.add_argument('--sizes', nargs='+', default=list(SIZES), choices=list(SIZES))
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=40, help="Requests per scenario")
+    parser.add_argument('--latency', type=float, default=0.05, help="Typical fake model latency in seconds")
+    parser.add_argument('--distribution', default='lognormal', choices=['fixed', 'uniform', 'exponential', 'lognormal'])
+    parser.add_argument('--responses', help="JSONL of recorded responses to replay")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--startup-runs', type=int, default=3)
+    parser.add_argument('--output', help="Write results JSON here instead of stdout")
+    parser.add_argument('--compare', help="Earlier results JSON to compare against")
+    parser.add_argument('--record', help="Record live responses to this JSONL file and exit")
+    args = parser.parse_args()
+
+    if args.record:
+        record_responses(args.record)
+        return
+
+    # Configure the fake model before any app module is imported
+    os.environ.update({
+        "USE_FAKE_MODEL": "1",
+        "FAKE_MODEL_LATENCY": str(args.latency),
+        "FAKE_MODEL_LATENCY_DIST": args.distribution,
+        "FAKE_MODEL_SEED": str(args.seed)
+    })
+    if args.responses:
+        os.environ["FAKE_MODEL_RESPONSES"] = os.path.abspath(args.responses)
+    os.environ.setdefault("MODEL_RATE_LIMIT", "0")
+    os.environ.setdefault("MODEL_CONCURRENCY", "64")
+    os.environ.setdefault("SEMANTIC_CACHE", "0")
+
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "settings": {
+            "latency": args.latency,
+            "distribution": args.distribution,
+            "responses": args.responses,
+            "seed": args.seed,
+            "requests": args.requests,
+            "rate_limit": os.environ["MODEL_RATE_LIMIT"],
+            "model_concurrency": os.environ["MODEL_CONCURRENCY"]
+        },
+        "startup": measure_startup(args.startup_runs),
+        "scenarios": []
+    }
+
+    for target in args.targets:
+        for size in args.sizes:
+            for concurrency in args.concurrency:
+                scenario = run_scenario(target, size, concurrency, args.requests)
+                results["scenarios"].append(scenario)
+                print(f"{target:<16} {size:<7} x{concurrency:<4} {scenario['throughput_rps']:>8.1f} req/s  "
+                      f"p50 {scenario['latency_ms']['p50']:.0f}ms  p99 {scenario['latency_ms']['p99']:.0f}ms  "
+                      f"errors {scenario['errors']}", file=sys.stderr)
+    results["peak_rss_mb"] = peak_rss_mb()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Measure transcript parsing throughput in MB/s on multi-MB uploads, plain
+and timestamped, and the cost of slicing and windowing a parsed transcript.
+
+Usage:
+    python benchmarks/bench_transcript_parser.py --size-mb 8 --repeat 5
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from example_conversations import get_example_conversation  # noqa: E402
+from transcript_chunker import make_windows  # noqa: E402
+from transcript_parser import parse  # noqa: E402
+
+EXAMPLES = [get_example_conversation(name) for name in ("cold_call", "discovery", "objection")]
+
+
+def build_transcript(size_mb, timestamped):
+    """Repeat the example calls until the transcript reaches size_mb."""
+    lines = [line for example in EXAMPLES for line in example.strip().splitlines() if line.strip()]
+    target = int(size_mb * 1024 * 1024)
+    parts = []
+    size = 0
+    second = 0
+    while size < target:
+        for line in lines:
+            if timestamped:
+                line = f"[{second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d}] {line}"
+                second += 7
+            parts.append(line)
+            size += len(line) + 1
+    return "\n".join(parts)
+
+
+def bench(label, text, repeat):
+    size_mb = len(text) / (1024 * 1024)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        transcript = parse(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{label}: {size_mb:.1f} MB, {len(transcript):,} turns, "
+          f"best {best * 1000:.1f}ms, {size_mb / best:.1f} MB/s")
+    return transcript
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the transcript parser")
+    parser.add_argument('--size-mb', type=float, default=8)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--window-tokens', type=int, default=6000)
+    args = parser.parse_args()
+
+    bench("Plain", build_transcript(args.size_mb, timestamped=False), args.repeat)
+    transcript = bench("Timestamped", build_transcript(args.size_mb, timestamped=True), args.repeat)
+
+    start = time.perf_counter()
+    middle = transcript[len(transcript) // 2:len(transcript) // 2 + 100]
+    excerpt = middle.text_range(0, len(middle))
+    print(f"Slice of 100 turns: {(time.perf_counter() - start) * 1e6:.0f}us ({len(excerpt):,} chars)")
+
+    start = time.perf_counter()
+    windows = make_windows(transcript, args.window_tokens)
+    print(f"Windowing: {len(windows):,} windows of {args.window_tokens} tokens "
+          f"in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
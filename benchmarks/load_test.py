@@ -0,0 +1,103 @@
+"""
+Compare concurrent-request throughput of the Flask and async (ASGI) servers.
+Both servers are started locally with the fake model (USE_FAKE_MODEL=1), so no
+API quota is used. Both share the same MODEL_CONCURRENCY cap on model calls in
+flight (set it in the environment to compare other sizes). Every request carries a distinct conversation and bypasses
+the cache, so each one costs a full (simulated) model call.
+
+Usage:
+    python benchmarks/load_test.py --requests 200 --concurrency 50 --latency 0.5
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+SERVERS = {
+    "flask": [sys.executable, "-m", "flask", "--app", "backend", "run", "--port", "{port}"],
+    "asgi": [sys.executable, "serve.py", "--port", "{port}", "--workers", "1"]
+}
+
+
+def wait_until_up(port, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def post_analysis(port, index):
+    body = json.dumps({
+        "conversation": f"Salesperson: Hello, this is call #{index}.\nCustomer: Hi there.",
+        "analysis_type": "general",
+        "bypass_cache": True
+    }).encode("utf-8")
+    req = urllib.request.Request(
+        f"http://127.0.0.1:{port}/api/analyze",
+        data=body,
+        headers={"Content-Type": "application/json"}
+    )
+    start = time.perf_counter()
+    try:
+        urllib.request.urlopen(req, timeout=120).read()
+        ok = True
+    except OSError:
+        ok = False
+    return ok, time.perf_counter() - start
+
+
+def run_load(port, total, concurrency):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda i: post_analysis(port, i), range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for ok, latency in results if ok)
+    errors = sum(1 for ok, _ in results if not ok)
+    p50 = latencies[len(latencies) // 2] if latencies else 0.0
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else 0.0
+    return {
+        "throughput_rps": round(total / elapsed, 1),
+        "p50_ms": round(p50 * 1000, 1),
+        "p95_ms": round(p95 * 1000, 1),
+        "errors": errors
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Flask and ASGI server throughput")
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.5, help="Fake model latency in seconds")
+    parser.add_argument('--servers', nargs='+', default=list(SERVERS), choices=list(SERVERS))
+    args = parser.parse_args()
+
+    env = dict(os.environ, USE_FAKE_MODEL="1", FAKE_MODEL_LATENCY=str(args.latency))
+    env.setdefault("MODEL_RATE_LIMIT", "0")
+    for offset, name in enumerate(args.servers):
+        port = 5100 + offset
+        command = [part.format(port=port) for part in SERVERS[name]]
+        server = subprocess.Popen(command, cwd=ROOT, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_until_up(port)
+            result = run_load(port, args.requests, args.concurrency)
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"{name:<6} {json.dumps(result)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+"""
+Offline bulk analysis of a call archive.
+Streams transcripts from a directory of .txt files or a JSONL file through
+get_ai_feedback with bounded concurrency, appending results to a JSONL file as
+they finish. Progress is checkpointed, so an interrupted run can be resumed
+with the same command without repeating finished items. The checkpoint records
+which source and options it belongs to, and a run refuses to resume from a
+checkpoint written for a different archive. Only a bounded window
+of items is held in memory at any time.
+
+Usage:
+    python bulk_analyze.py calls/ results.jsonl --concurrency 8
+    python bulk_analyze.py calls.jsonl results.jsonl --analysis-type objections --methodology SPIN
+    python bulk_analyze.py calls.jsonl results.jsonl --fake        # deterministic fake model
+
+JSONL input lines look like {"id": "call-1", "conversation": "...", "analysis_type": "general"};
+"id", "analysis_type" and "methodology" are optional.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import resource
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+def transcript_names(source):
+    return sorted(name for name in os.listdir(source) if name.endswith('.txt'))
+
+
+def read_items(source, analysis_type, methodology):
+    """Yield (index, item) pairs from a directory of .txt files or a JSONL file."""
+    if os.path.isdir(source):
+        for index, name in enumerate(transcript_names(source)):
+            with open(os.path.join(source, name), encoding='utf-8') as f:
+                conversation = f.read()
+            yield index, {"id": name, "conversation": conversation,
+                          "analysis_type": analysis_type, "methodology": methodology}
+        return
+
+    with open(source, encoding='utf-8') as f:
+        for index, line in enumerate(f):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            yield index, {
+                "id": str(record.get('id', index)),
+                "conversation": record.get('conversation', ''),
+                "analysis_type": record.get('analysis_type', analysis_type),
+                "methodology": record.get('methodology', methodology)
+            }
+
+
+def source_fingerprint(source, options):
+    """Return a digest of the source path, its item ids in order and the run options.
+
+    Indexes in a checkpoint only mean the same items while this is unchanged.
+    """
+    digest = hashlib.sha256(json.dumps([os.path.abspath(source), options]).encode('utf-8'))
+    if os.path.isdir(source):
+        ids = enumerate(transcript_names(source))
+    else:
+        ids = ((index, item["id"]) for index, item in read_items(source, None, None))
+    for index, item_id in ids:
+        digest.update(f"{index}:{item_id}\0".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class CheckpointMismatchError(Exception):
+    """Raised when a checkpoint was written for a different source or options."""
+
+
+class Checkpoint:
+    """Tracks finished items as a watermark plus the finished items above it.
+
+    Every index below the watermark is done. Since at most `window` items
+    are in flight, the set above the watermark stays bounded, so the
+    checkpoint (and memory) do not grow with the size of the archive.
+    The source fingerprint ties the indexes to the items they were read from.
+    """
+
+    def __init__(self, path, source):
+        self.path = path
+        self.source = source
+        self.watermark = 0
+        self.done_above = set()
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get("source") != source:
+                raise CheckpointMismatchError(
+                    f"{path} was written for a different source, item list or options; "
+                    "delete it to start over or choose another output file"
+                )
+            self.watermark = state["watermark"]
+            self.done_above = set(state["done_above"])
+
+    def is_done(self, index):
+        return index < self.watermark or index in self.done_above
+
+    def mark_done(self, index):
+        if index < self.watermark:
+            return
+        self.done_above.add(index)
+        while self.watermark in self.done_above:
+            self.done_above.remove(self.watermark)
+            self.watermark += 1
+
+    def save(self):
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({"source": self.source, "watermark": self.watermark,
+                       "done_above": sorted(self.done_above)}, f)
+        os.replace(temp_path, self.path)
+
+
+class LatencySample:
+    """Fixed-size reservoir sample of latencies, so percentiles use bounded memory."""
+
+    def __init__(self, size=10000):
+        self.size = size
+        self.values = []
+        self.seen = 0
+
+    def add(self, value):
+        self.seen += 1
+        if len(self.values) < self.size:
+            self.values.append(value)
+        else:
+            slot = random.randrange(self.seen)
+            if slot < self.size:
+                self.values[slot] = value
+
+    def percentile(self, q):
+        if not self.values:
+            return 0.0
+        ordered = sorted(self.values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def analyze_item(item, analyze):
+    """Analyze one item, capturing errors and timing in the result record."""
+    start = time.perf_counter()
+    result = {"id": item["id"], "analysis_type": item["analysis_type"], "methodology": item["methodology"]}
+    try:
+        if not item["conversation"]:
+            raise ValueError("No conversation provided")
+        result.update(analyze(item))
+    except Exception as e:
+        result["error"] = str(e)
+    result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+
+def run(args, analyze):
+    """Process every unfinished item and return a throughput report."""
+    options = [args.analysis_type, args.methodology, args.mode]
+    checkpoint = Checkpoint(args.output + '.checkpoint', source_fingerprint(args.source, options))
+    window = args.concurrency * 2
+    latencies = LatencySample()
+    processed = skipped = errors = 0
+    start = time.perf_counter()
+
+    with open(args.output, 'a', encoding='utf-8') as out, \
+            ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        in_flight = {}
+
+        def drain(block_until_below):
+            nonlocal processed, errors
+            while len(in_flight) >= block_until_below:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index = in_flight.pop(future)
+                    result = future.result()
+                    out.write(json.dumps(result) + "\n")
+                    out.flush()
+                    checkpoint.mark_done(index)
+                    checkpoint.save()
+                    processed += 1
+                    errors += 'error' in result
+                    latencies.add(result["elapsed_ms"])
+
+        previous_index = -1
+        for index, item in read_items(args.source, args.analysis_type, args.methodology):
+            # Indexes without an item (blank lines) count as done
+            for missing in range(previous_index + 1, index):
+                checkpoint.mark_done(missing)
+            previous_index = index
+
+            if checkpoint.is_done(index):
+                skipped += 1
+                continue
+            drain(window)
+            in_flight[executor.submit(analyze_item, item, analyze)] = index
+        drain(1)
+
+    elapsed = time.perf_counter() - start
+    report = {
+        "processed": processed,
+        "skipped_from_checkpoint": skipped,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_per_s": round(processed / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": latencies.percentile(0.5),
+        "p95_ms": latencies.percentile(0.95),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-analyze a call archive into a JSONL results file")
+    parser.add_argument('source', help="Directory of .txt transcripts or a JSONL file")
+    parser.add_argument('output', help="JSONL file that results are appended to")
+    parser.add_argument('--analysis-type', default='general')
+    parser.add_argument('--methodology', default='none')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--mode', choices=['ai', 'fast'], default='ai',
+                        help="'fast' scores transcripts with local heuristics only")
+    parser.add_argument('--fake', action='store_true', help="Use the deterministic fake model (no API calls)")
+    parser.add_argument('--fake-latency', type=float, default=0.05, help="Fake model latency in seconds")
+    args = parser.parse_args()
+
+    if args.fake:
+        os.environ['USE_FAKE_MODEL'] = '1'
+        os.environ['FAKE_MODEL_LATENCY'] = str(args.fake_latency)
+        os.environ.setdefault('MODEL_RATE_LIMIT', '0')
+
+    if args.mode == 'fast':
+        import fast_analysis
+
+        def analyze(item):
+            metrics = fast_analysis.analyze(item["conversation"], item["methodology"])
+            return {"feedback": fast_analysis.format_report(metrics), "metrics": metrics}
+    else:
+        from backend import get_ai_feedback
+        from scheduler import BATCH, call_options
+
+        def analyze(item):
+            # Archive runs yield the model quota to interactive requests
+            with call_options(BATCH):
+                return {"feedback": get_ai_feedback(item["conversation"], item["analysis_type"], item["methodology"])}
+
+    try:
+        report = run(args, analyze)
+    except CheckpointMismatchError as e:
+        sys.exit(f"Cannot resume: {e}")
+    print(json.dumps(report, indent=2), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
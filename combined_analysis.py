@@ -0,0 +1,74 @@
+"""
+Single-pass analysis of several analysis types at once.
+Running general, objections, closing, rapport and pitch one after another
+sends the same transcript and system prompt five times. A combined analysis
+asks the model for every selected type in one JSON response and splits it
+back into per-type feedback. If the response cannot be parsed (or the
+transcript needs windowed analysis), each type is analyzed separately, in
+parallel.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from compaction import compact_for_prompt
+from prompt_builder import ANALYSIS_LABELS, build_combined_prompt, parse_combined_response
+from transcript_chunker import is_long_transcript
+
+_lock = threading.Lock()
+_counters = {"single_pass": 0, "fallbacks": 0}
+
+
+def _count(name):
+    with _lock:
+        _counters[name] += 1
+
+
+def stats():
+    """Return how many combined analyses were answered in one pass or fell back."""
+    with _lock:
+        return dict(_counters)
+
+
+def combined_feedback(conversation, analysis_types, methodology, generate, analyze_one):
+    """Return ({analysis_type: feedback}, single_pass) for a conversation.
+
+    generate(prompt) sends the combined prompt to the model;
+    analyze_one(analysis_type) runs a normal single-type analysis and is used
+    for the parallel fallback.
+    """
+    if len(analysis_types) > 1 and not is_long_transcript(conversation):
+        compacted = compact_for_prompt(conversation, methodology=methodology, analysis_types=analysis_types)
+        prompt = build_combined_prompt(compacted, analysis_types, methodology)
+        try:
+            analyses = parse_combined_response(generate(prompt), analysis_types)
+            _count("single_pass")
+            return analyses, True
+        except ValueError:
+            _count("fallbacks")
+
+    with ThreadPoolExecutor(max_workers=len(analysis_types)) as executor:
+        results = list(executor.map(analyze_one, analysis_types))
+    return dict(zip(analysis_types, results)), False
+
+
+async def combined_feedback_async(conversation, analysis_types, methodology, generate, analyze_one):
+    """Async variant of combined_feedback(); generate and analyze_one are coroutine functions."""
+    if len(analysis_types) > 1 and not is_long_transcript(conversation):
+        compacted = compact_for_prompt(conversation, methodology=methodology, analysis_types=analysis_types)
+        prompt = build_combined_prompt(compacted, analysis_types, methodology)
+        try:
+            analyses = parse_combined_response(await generate(prompt), analysis_types)
+            _count("single_pass")
+            return analyses, True
+        except ValueError:
+            _count("fallbacks")
+
+    results = await asyncio.gather(*(analyze_one(t) for t in analysis_types))
+    return dict(zip(analysis_types, results)), False
+
+
+def format_combined_feedback(analyses):
+    """Join per-type feedback into one markdown report with a heading per type."""
+    return "\n\n".join(f"# {ANALYSIS_LABELS[t]}\n\n{feedback}" for t, feedback in analyses.items())
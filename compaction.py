@@ -0,0 +1,171 @@
+"""
+Transcript compaction before analysis.
+Model latency and cost grow with prompt length, and exported transcripts
+carry repeated whitespace and backchannel turns ("Mm-hmm.", "Uh-huh.") that
+add tokens without adding anything to analyze. With PROMPT_COMPACTION=1, a
+conversation is whitespace-normalized and backchannel turns are dropped
+before the prompt is built. Turns are then trimmed to
+PROMPT_TOKEN_BUDGET, and prompts use compact prefixes that keep only the
+methodology components relevant to the analysis type (see prompt_builder.py).
+Tokens saved are reported per request and in /api/stats.
+"""
+
+import os
+import re
+import threading
+
+from metrics import current_timer
+from prompt_builder import (
+    ANALYSIS_PROMPTS, COMPACT_PREFIXES, COMPACT_SYSTEM_PROMPTS, PROMPT_PREFIXES, SYSTEM_PROMPTS,
+    estimate_tokens, normalize_methodology, prompt_compaction_enabled
+)
+from transcript_chunker import is_long_transcript
+from transcript_parser import CUSTOMER, SALESPERSON, UNKNOWN, parse_cached
+
+# Estimated conversation tokens allowed in one prompt after compaction (0 for no limit)
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "0"))
+
+# Non-lexical listener sounds; a turn made only of these is a backchannel
+BACKCHANNEL_WORDS = {"uh", "um", "umm", "er", "ah", "hmm", "mm", "mhm", "mmhmm", "uhhuh", "huh"}
+
+# Words that carry little information, for ranking turns when trimming to the budget
+FILLER_WORDS = {
+    "ok", "okay", "alright", "yeah", "yep", "yes", "uh", "um", "umm", "er", "ah", "oh", "hmm", "mm", "mhm",
+    "mmhmm", "uhhuh", "huh", "right", "sure", "great", "cool", "nice", "good", "fine", "well", "so", "got",
+    "it", "i", "see", "thanks", "thank", "you", "hi", "hello", "hey", "bye", "goodbye", "sounds", "perfect",
+    "absolutely"
+}
+
+# Longest turn (in words) that can count as a backchannel
+MAX_BACKCHANNEL_WORDS = 4
+
+# Analysis types that read short replies as outcomes (acceptances, agreement), so keep backchannels
+KEEP_BACKCHANNEL_TYPES = ("closing", "rapport")
+
+# A salesperson turn like this makes the next customer turn its answer, however short
+PROPOSAL_PATTERN = re.compile(
+    r"\?|\b(?:recommend|suggest|propose|schedule|book|how about|what about|would you|shall we|let's|"
+    r"let me|next step|sign|demo|trial|agree)\b",
+    re.IGNORECASE
+)
+
+# Turns at the end of a call are kept when trimming to the budget, since they hold the close
+PROTECTED_TAIL_TURNS = 2
+
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+_lock = threading.Lock()
+_counters = {"requests": 0, "tokens_before": 0, "tokens_after": 0, "prefix_tokens_saved": 0, "turns_dropped": 0}
+
+
+def is_backchannel(content):
+    """Return True for a short turn made only of listener sounds such as "Mm-hmm."."""
+    words = WORD_PATTERN.findall(content.lower().replace("-", ""))
+    return len(words) <= MAX_BACKCHANNEL_WORDS and all(word in BACKCHANNEL_WORDS for word in words)
+
+
+def normalize_whitespace(text):
+    """Collapse runs of spaces within each line and drop blank lines, keeping the line breaks."""
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def information(content):
+    """Score a turn by its distinct non-filler words, with a bonus for questions."""
+    words = set(WORD_PATTERN.findall(content.lower())) - FILLER_WORDS
+    return len(words) + (3 if "?" in content else 0)
+
+
+def compact(conversation, keep_backchannels=False, budget=None):
+    """Return (compacted conversation, turns dropped).
+
+    Backchannel turns are dropped unless keep_backchannels is set (for
+    closing and rapport analyses). A customer turn answering a salesperson
+    question or proposal is always kept, since it may accept or reject it.
+    If the result is over budget (estimated tokens) and short enough for one
+    prompt, the least informative turns are dropped until it fits. The
+    opening turn, the last turns and answers to proposals are always kept.
+    """
+    budget = PROMPT_TOKEN_BUDGET if budget is None else budget
+    transcript = parse_cached(conversation)
+    turns = []
+    answers = set()
+    previous_proposal = False
+    for i in range(len(transcript)):
+        content = transcript.content(i)
+        speaker = transcript.speakers[i]
+        answer = previous_proposal and speaker == CUSTOMER
+        if not keep_backchannels and i and speaker != UNKNOWN and not answer and is_backchannel(content):
+            continue
+        if answer:
+            answers.add(len(turns))
+        previous_proposal = speaker == SALESPERSON and bool(PROPOSAL_PATTERN.search(content))
+        # Line breaks are kept: an unlabeled transcript is one turn whose lines are its structure
+        turns.append((i, normalize_whitespace(transcript.raw(i))))
+
+    dropped = len(transcript) - len(turns)
+    compacted = "\n".join(text for _, text in turns)
+    if not budget or estimate_tokens(compacted) <= budget or is_long_transcript(compacted):
+        return compacted, dropped
+
+    # Over budget: drop the least informative middle turns first
+    tokens = estimate_tokens(compacted)
+    candidates = sorted((k for k in range(1, max(1, len(turns) - PROTECTED_TAIL_TURNS)) if k not in answers),
+                        key=lambda k: (information(transcript.content(turns[k][0])), k))
+    removed = set()
+    for k in candidates:
+        if tokens <= budget:
+            break
+        removed.add(k)
+        tokens -= estimate_tokens(turns[k][1]) + 1
+    compacted = "\n".join(text for k, (_, text) in enumerate(turns) if k not in removed)
+    return compacted, dropped + len(removed)
+
+
+def prefix_tokens_saved(analysis_type, methodology=None):
+    """Return the estimated tokens a compact prompt prefix saves over the full one.
+
+    analysis_type None stands for a combined prompt, which starts with the system prompt alone.
+    """
+    methodology = normalize_methodology(methodology)
+    if analysis_type is None:
+        return estimate_tokens(SYSTEM_PROMPTS[methodology]) - estimate_tokens(COMPACT_SYSTEM_PROMPTS[methodology])
+    key = (analysis_type if analysis_type in ANALYSIS_PROMPTS else "general", methodology)
+    return estimate_tokens(PROMPT_PREFIXES[key]) - estimate_tokens(COMPACT_PREFIXES[key])
+
+
+def compact_for_prompt(conversation, analysis_type="general", methodology=None, analysis_types=None):
+    """Return the conversation to put in a prompt, compacted when PROMPT_COMPACTION=1.
+
+    Pass analysis_types instead of analysis_type for a combined prompt.
+    Tokens saved (conversation plus prompt prefix) are recorded on the
+    current request and in stats().
+    """
+    if not prompt_compaction_enabled():
+        return conversation
+    if analysis_types is not None:
+        analysis_type = None
+    keep_backchannels = any(t in KEEP_BACKCHANNEL_TYPES for t in (analysis_types or [analysis_type]))
+    compacted, dropped = compact(conversation, keep_backchannels=keep_backchannels)
+    before = estimate_tokens(conversation)
+    after = estimate_tokens(compacted)
+    prefix_saved = prefix_tokens_saved(analysis_type, methodology)
+    timer = current_timer()
+    if timer is not None:
+        timer.record_tokens_saved(before - after + prefix_saved)
+    with _lock:
+        _counters["requests"] += 1
+        _counters["tokens_before"] += before
+        _counters["tokens_after"] += after
+        _counters["prefix_tokens_saved"] += prefix_saved
+        _counters["turns_dropped"] += dropped
+    return compacted
+
+
+def stats():
+    """Return how many prompt tokens compaction has saved."""
+    with _lock:
+        counters = dict(_counters)
+    counters["tokens_saved"] = counters["tokens_before"] - counters["tokens_after"] + counters["prefix_tokens_saved"]
+    counters["enabled"] = prompt_compaction_enabled()
+    return counters
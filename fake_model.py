@@ -0,0 +1,194 @@
+"""
+Local stand-in for google.generativeai.GenerativeModel.
+Returns canned or recorded feedback after a simulated delay so the backend
+can be exercised and benchmarked without spending API quota.
+Enable it for the servers by setting USE_FAKE_MODEL=1.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+
+FAKE_FEEDBACK = """## Overall Assessment
+- The salesperson opened politely but moved to the pitch before understanding the customer's needs.
+
+## Recommendations
+1. **Ask discovery questions first**: "What does your current process look like?"
+2. **Acknowledge objections** before responding with value.
+3. **Close with a clear next step** such as a scheduled demo.
+"""
+
+# Short, unstructured answer returned for a fraction of fast-model calls (FAKE_MODEL_WEAK_RATE)
+WEAK_FEEDBACK = "The conversation went reasonably well overall."
+
+
+# Combined (multi-type) prompts list the requested types in a JSON schema
+REQUIRED_TYPES_PATTERN = re.compile(r'"required": (\[[^\]]*\])')
+
+
+# Simulated latency distributions, each drawn around the configured latency
+LATENCY_DISTRIBUTIONS = {
+    "fixed": lambda latency, rng: latency,
+    "uniform": lambda latency, rng: rng.uniform(0.5 * latency, 1.5 * latency),
+    "exponential": lambda latency, rng: rng.expovariate(1 / latency) if latency > 0 else 0.0,
+    # Long-tailed like real model latency: median at the given latency, p99 about 3x the median
+    "lognormal": lambda latency, rng: rng.lognormvariate(math.log(latency), 0.5) if latency > 0 else 0.0
+}
+
+
+def prompt_key(prompt):
+    """Return the key a recorded response is stored under."""
+    return hashlib.sha256(str(prompt).encode("utf-8")).hexdigest()
+
+
+def load_responses(path):
+    """Read recorded responses from a JSONL file of {"prompt_key": ..., "text": ...} lines.
+
+    Returns (responses by prompt key, all texts in file order).
+    """
+    by_key = {}
+    texts = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                texts.append(record["text"])
+                if record.get("prompt_key"):
+                    by_key[record["prompt_key"]] = record["text"]
+    return by_key, texts
+
+
+def fake_text(prompt, recorded=None):
+    """Return feedback for a prompt, as a JSON object when the prompt asks for one.
+
+    With recorded = (by_key, texts) from load_responses(), a prompt that was
+    recorded gets its recorded response and any other prompt gets one of the
+    recorded texts, picked by prompt so reruns stay deterministic.
+    """
+    key = prompt_key(prompt)
+    if recorded and key in recorded[0]:
+        return recorded[0][key]
+    match = REQUIRED_TYPES_PATTERN.search(str(prompt))
+    if match:
+        return json.dumps({t: FAKE_FEEDBACK for t in json.loads(match.group(1))})
+    if recorded and recorded[1]:
+        return recorded[1][int(key[:8], 16) % len(recorded[1])]
+    return FAKE_FEEDBACK
+
+
+class FakeResponse:
+    """Minimal response object exposing the .text attribute the app reads."""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class ResourceExhausted(Exception):
+    """Stand-in for the API's 429 quota error."""
+
+    code = 429
+
+
+class FakeGenerativeModel:
+    """Drop-in replacement for genai.GenerativeModel that sleeps instead of calling the API.
+
+    latency is the typical delay in seconds; distribution names one of
+    LATENCY_DISTRIBUTIONS. input_latency adds seconds per 1,000 estimated
+    prompt tokens, so longer prompts take longer as with the real API.
+    responses_path points at recorded responses to replay (see load_responses()).
+    Models with "flash" in their name stand in for the fast tier: their
+    latency is scaled by FAKE_MODEL_FAST_FACTOR, and FAKE_MODEL_WEAK_RATE of
+    their answers are weak enough to be escalated by the model router.
+    """
+
+    def __init__(self, model_name='fake-model', latency=None, distribution=None, responses_path=None, seed=None,
+                 input_latency=None):
+        self.model_name = model_name
+        fast = "flash" in model_name
+        if latency is None:
+            latency = float(os.getenv('FAKE_MODEL_LATENCY', '0.5'))
+            if fast:
+                latency *= float(os.getenv('FAKE_MODEL_FAST_FACTOR', '0.3'))
+        self.latency = latency
+        if input_latency is None:
+            input_latency = float(os.getenv('FAKE_MODEL_INPUT_LATENCY', '0'))
+        self.input_latency = input_latency
+        distribution = distribution or os.getenv('FAKE_MODEL_LATENCY_DIST', 'fixed')
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.distribution = distribution
+        if seed is None and os.getenv('FAKE_MODEL_SEED'):
+            seed = int(os.getenv('FAKE_MODEL_SEED'))
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        responses_path = responses_path or os.getenv('FAKE_MODEL_RESPONSES')
+        self.recorded = load_responses(responses_path) if responses_path else None
+        # Fraction of calls that fail with a 429, to exercise retries and backoff
+        self.error_rate = float(os.getenv('FAKE_MODEL_ERROR_RATE', '0'))
+        self.weak_rate = float(os.getenv('FAKE_MODEL_WEAK_RATE', '0')) if fast else 0.0
+        # Separate stream so weak answers are not correlated with latency draws
+        self._weak_rng = random.Random(seed)
+
+    def _delay(self, prompt):
+        """Draw one simulated response time for a prompt."""
+        with self._rng_lock:
+            delay = LATENCY_DISTRIBUTIONS[self.distribution](self.latency, self._rng)
+        return delay + self.input_latency * len(str(prompt)) / 4000
+
+    def _maybe_fail(self):
+        if not self.error_rate:
+            return
+        with self._rng_lock:
+            failed = self._rng.random() < self.error_rate
+        if failed:
+            raise ResourceExhausted("429 Resource has been exhausted (fake quota error)")
+
+    def _text(self, prompt):
+        if self.weak_rate:
+            with self._rng_lock:
+                weak = self._weak_rng.random() < self.weak_rate
+            if weak:
+                return WEAK_FEEDBACK
+        return fake_text(prompt, self.recorded)
+
+    def generate_content(self, prompt, stream=False):
+        """Simulate a model call and return canned feedback.
+
+        With stream=True, returns an iterator of line-sized chunks: the first
+        chunk arrives after a tenth of the latency and the rest are spread
+        over the remainder.
+        """
+        self._maybe_fail()
+        if stream:
+            return self._stream(prompt)
+        time.sleep(self._delay(prompt))
+        return FakeResponse(self._text(prompt))
+
+    async def generate_content_async(self, prompt):
+        """Simulate a model call without blocking the event loop."""
+        self._maybe_fail()
+        await asyncio.sleep(self._delay(prompt))
+        return FakeResponse(self._text(prompt))
+
+    def count_tokens(self, contents):
+        """Return a rough token count, standing in for the API's count_tokens."""
+        return {"total_tokens": len(str(contents)) // 4}
+
+    def _stream(self, prompt):
+        lines = self._text(prompt).splitlines(keepends=True) or [""]
+        delay = self._delay(prompt)
+        time.sleep(delay * 0.1)
+        for line in lines:
+            yield FakeResponse(line)
+            time.sleep(delay * 0.9 / len(lines))
+
+
+def use_fake_model():
+    """Return True when the servers should use the fake model."""
+    return os.getenv('USE_FAKE_MODEL', '0') == '1'
@@ -0,0 +1,221 @@
+"""
+Local rule-and-lexicon analysis of sales conversations.
+Computes talk-time ratios, question counts, objection and closing signals and
+sales methodology coverage from the Salesperson:/Customer: turns in
+milliseconds, without a model call. Useful for instant feedback and for bulk
+triage before sending flagged calls to the model.
+"""
+
+import re
+
+from prompt_builder import normalize_methodology
+from sales_methodologies import METHODOLOGIES
+from transcript_parser import CUSTOMER, SALESPERSON, parse_cached
+
+# Phrases signalling customer objections, by category
+OBJECTION_LEXICON = {
+    "price": ["expensive", "cost", "price", "budget", "afford", "cheaper", "justify the cost"],
+    "timing": ["busy", "not a good time", "not now", "later", "next quarter", "next year", "in the middle of"],
+    "no_need": ["not interested", "happy with", "don't need", "do not need", "already have", "current solution"],
+    "authority": ["my boss", "check with", "not my decision", "run it by", "the rest of the team", "buy-in"],
+    "trust": ["not sure", "skeptical", "doubt", "heard that before", "prove"]
+}
+
+# Phrases signalling salesperson behaviours
+SALESPERSON_LEXICON = {
+    "closing": ["schedule", "demo", "next step", "proposal", "calendar invite", "sign", "get started", "move forward"],
+    "empathy": ["i understand", "i appreciate", "thank you for sharing", "that makes sense", "i see"],
+    "pressure": ["limited-time", "limited time", "discount", "act now", "wait!", "only today"]
+}
+
+# Phrases indicating each methodology component was covered, keyed like METHODOLOGIES
+COMPONENT_LEXICON = {
+    "SPIN": {
+        "Situation": ["currently", "current", "how do you", "what systems", "who's responsible", "process"],
+        "Problem": ["challenge", "issue", "problem", "pain", "struggle", "satisfied with"],
+        "Implication": ["affect", "impact", "consequence", "what happens if", "causing"],
+        "Need-Payoff": ["how would it help", "value of", "benefit", "would that help", "if we could"]
+    },
+    "BANT": {
+        "Budget": ["budget", "price", "cost", "investment", "spend"],
+        "Authority": ["decision", "stakeholder", "sign off", "who else", "involved", "director"],
+        "Need": ["need", "challenge", "looking to", "pain", "issue"],
+        "Timeline": ["when", "timeline", "next week", "this quarter", "deadline", "by the end of"]
+    },
+    "CHALLENGER": {
+        "Teach": ["insight", "research", "companies similar", "we've found", "data shows"],
+        "Tailor": ["your specific", "for your team", "customized", "based on what you've shared", "your situation"],
+        "Take Control": ["next step", "i'll send", "i'll prepare", "let's schedule", "i recommend"]
+    },
+    "SOLUTION": {
+        "Pain": ["challenge", "problem", "pain", "issue", "delay"],
+        "Power": ["decision", "stakeholder", "director", "sign off", "who else"],
+        "Vision": ["imagine", "picture", "would look like", "real-time", "automates"],
+        "Value": ["roi", "save", "reduce", "value", "business case"],
+        "Control": ["next step", "i'll send", "calendar", "follow up", "proposal"]
+    }
+}
+
+# Thresholds for individual flags, tuned so the bundled discovery call (a good call) raises none
+MAX_SALESPERSON_TALK_RATIO = 0.70
+MIN_SALESPERSON_QUESTIONS = 2
+
+# How much each flag counts toward a call's severity
+FLAG_WEIGHTS = {
+    "salesperson_dominates_conversation": 1,
+    "few_discovery_questions": 2,
+    "objections_without_acknowledgement": 3,
+    "no_closing_attempt": 2,
+    "pressure_tactics": 3,
+    "low_methodology_coverage": 1
+}
+
+# Calls at or above this severity deserve a full model analysis
+REVIEW_SEVERITY = 3
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9'-]*!?")
+INFLECTIONS = ("s", "es", "d", "ed", "ing")
+
+
+def _tokens(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _compile_lexicon(lexicon):
+    """Compile a {category: [phrases]} lexicon into a first-token index.
+
+    Matching is then a single pass over the tokens of a text with one dict
+    lookup per token. The last word of each phrase also matches simple
+    inflections, so "challenge" counts "challenges" too.
+    """
+    categories = list(lexicon)
+    index = {}
+    for category_id, category in enumerate(categories):
+        for phrase in lexicon[category]:
+            words = _tokens(phrase)
+            for last in [words[-1]] + [words[-1] + suffix for suffix in INFLECTIONS]:
+                variant = tuple(words[:-1]) + (last,)
+                index.setdefault(variant[0], []).append((variant, category_id))
+    # Try longer phrases first so "not interested" wins over shorter overlaps
+    for candidates in index.values():
+        candidates.sort(key=lambda candidate: len(candidate[0]), reverse=True)
+    return categories, index
+
+
+def _count(compiled, tokens):
+    categories, index = compiled
+    counts = [0] * len(categories)
+    i = 0
+    total = len(tokens)
+    while i < total:
+        step = 1
+        for phrase, category_id in index.get(tokens[i], ()):
+            size = len(phrase)
+            if size == 1 or tuple(tokens[i:i + size]) == phrase:
+                counts[category_id] += 1
+                step = size
+                break
+        i += step
+    return dict(zip(categories, counts))
+
+
+OBJECTION_INDEX = _compile_lexicon(OBJECTION_LEXICON)
+SALESPERSON_INDEX = _compile_lexicon(SALESPERSON_LEXICON)
+COMPONENT_INDEXES = {name: _compile_lexicon(lexicon) for name, lexicon in COMPONENT_LEXICON.items()}
+
+
+def analyze(conversation, methodology=None):
+    """Return structured metrics for a conversation without calling the model."""
+    transcript = parse_cached(conversation)
+    counts = transcript.turn_counts()
+    turns = {"salesperson": counts["salesperson"], "customer": counts["customer"]}
+    salesperson = transcript.speaker_text(SALESPERSON)
+    customer = transcript.speaker_text(CUSTOMER)
+    salesperson_tokens = _tokens(salesperson)
+    customer_tokens = _tokens(customer)
+    salesperson_words = len(salesperson_tokens)
+    customer_words = len(customer_tokens)
+    total_words = salesperson_words + customer_words
+
+    metrics = {
+        "turns": turns,
+        "words": {"salesperson": salesperson_words, "customer": customer_words},
+        "salesperson_talk_ratio": round(salesperson_words / total_words, 3) if total_words else 0.0,
+        "questions": {"salesperson": salesperson.count("?"), "customer": customer.count("?")},
+        "objections": _count(OBJECTION_INDEX, customer_tokens),
+        "salesperson_signals": _count(SALESPERSON_INDEX, salesperson_tokens)
+    }
+
+    methodology = normalize_methodology(methodology)
+    if methodology in COMPONENT_INDEXES:
+        hits = _count(COMPONENT_INDEXES[methodology], salesperson_tokens)
+        components = list(METHODOLOGIES[methodology]["components"])
+        metrics["methodology"] = {
+            "name": methodology,
+            "components": {component: hits.get(component, 0) for component in components},
+            "coverage": round(sum(1 for c in components if hits.get(c)) / len(components), 3)
+        }
+
+    metrics["flags"] = _flags(metrics)
+    metrics["severity"] = sum(FLAG_WEIGHTS[flag] for flag in metrics["flags"])
+    metrics["needs_review"] = metrics["severity"] >= REVIEW_SEVERITY
+    return metrics
+
+
+def _flags(metrics):
+    flags = []
+    if metrics["salesperson_talk_ratio"] > MAX_SALESPERSON_TALK_RATIO:
+        flags.append("salesperson_dominates_conversation")
+    if metrics["questions"]["salesperson"] < MIN_SALESPERSON_QUESTIONS:
+        flags.append("few_discovery_questions")
+    if sum(metrics["objections"].values()) and not metrics["salesperson_signals"]["empathy"]:
+        flags.append("objections_without_acknowledgement")
+    if not metrics["salesperson_signals"]["closing"]:
+        flags.append("no_closing_attempt")
+    if metrics["salesperson_signals"]["pressure"]:
+        flags.append("pressure_tactics")
+    if "methodology" in metrics and metrics["methodology"]["coverage"] < 0.5:
+        flags.append("low_methodology_coverage")
+    return flags
+
+
+FLAG_DESCRIPTIONS = {
+    "salesperson_dominates_conversation": "The salesperson talks much more than the customer. Ask more and listen more.",
+    "few_discovery_questions": "Very few questions were asked. Use open-ended questions to uncover needs.",
+    "objections_without_acknowledgement": "Objections were raised but not acknowledged. Show empathy before responding.",
+    "no_closing_attempt": "No clear next step was proposed. Close with a concrete action such as a demo or proposal.",
+    "pressure_tactics": "Discounts or urgency were used as pressure. Lead with value instead.",
+    "low_methodology_coverage": "Less than half of the methodology's components were covered."
+}
+
+
+def format_report(metrics):
+    """Render fast-analysis metrics as markdown feedback."""
+    lines = [
+        "## Quick Analysis (local heuristics)",
+        f"- **Salesperson talk ratio**: {metrics['salesperson_talk_ratio']:.0%}",
+        f"- **Turns**: {metrics['turns']['salesperson']} salesperson / {metrics['turns']['customer']} customer",
+        f"- **Questions asked**: {metrics['questions']['salesperson']} by salesperson, "
+        f"{metrics['questions']['customer']} by customer"
+    ]
+
+    objections = [f"{name} ({count})" for name, count in metrics["objections"].items() if count]
+    lines.append(f"- **Objection signals**: {', '.join(objections) if objections else 'none detected'}")
+
+    if "methodology" in metrics:
+        method = metrics["methodology"]
+        covered = [name for name, count in method["components"].items() if count]
+        lines.append(f"- **{method['name']} coverage**: {method['coverage']:.0%} "
+                     f"({', '.join(covered) if covered else 'no components detected'})")
+
+    lines.append(f"- **Severity**: {metrics['severity']}"
+                 f"{' (full AI analysis recommended)' if metrics['needs_review'] else ''}")
+
+    lines.append("")
+    lines.append("## Flags")
+    if metrics["flags"]:
+        lines.extend(f"- {FLAG_DESCRIPTIONS[flag]}" for flag in metrics["flags"])
+    else:
+        lines.append("- No issues detected. Run a full AI analysis for detailed coaching.")
+    return "\n".join(lines)
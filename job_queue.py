@@ -0,0 +1,332 @@
+"""
+Persistent job queue for long analyses.
+A request submitted as a job is stored in SQLite and answered at once with
+a job id. A fixed pool of worker threads runs the analysis. Clients poll the
+job for its result or register a callback URL that receives it when the job
+finishes. Request latency no longer depends on model latency, and bursts
+wait in the queue instead of holding HTTP workers open.
+"""
+
+import ipaddress
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+STATUSES = (QUEUED, RUNNING, DONE, FAILED)
+
+
+def host_allowed(host, allowed_hosts):
+    """Return True when host is listed in allowed_hosts; ".example.com" also allows its subdomains."""
+    host = host.lower().rstrip(".")
+    for allowed in allowed_hosts:
+        if host == allowed.lstrip(".") or (allowed.startswith(".") and host.endswith(allowed)):
+            return True
+    return False
+
+
+def public_host(host):
+    """Return True when every address host resolves to is public (not loopback, private, link-local or reserved)."""
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, None)}
+    except (socket.gaierror, UnicodeError):
+        return False
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%")[0])
+        if not ip.is_global or ip.is_multicast:
+            return False
+    return bool(addresses)
+
+
+def valid_callback_url(url, allowed_hosts=()):
+    """Return True for an http(s) URL the server may POST results to.
+
+    With allowed_hosts, only those hosts are accepted. Otherwise the host
+    must resolve to public addresses only, so clients cannot make the
+    server call internal services or cloud metadata endpoints.
+    """
+    parsed = urlparse(url) if isinstance(url, str) else None
+    if not (parsed and parsed.scheme in ("http", "https") and parsed.hostname):
+        return False
+    if allowed_hosts:
+        return host_allowed(parsed.hostname, allowed_hosts)
+    return public_host(parsed.hostname)
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Refuse redirects, which could point a checked callback at an internal host."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class JobQueue:
+    """SQLite-backed job queue with a pool of worker threads.
+
+    handler(request) runs one job and returns a JSON-serializable result.
+    The database is opened on first use and no thread runs until start() is
+    called, so only the process that calls start() takes jobs; queued jobs
+    left from an earlier run are picked up then. Several processes may share one database: jobs
+    are claimed with a conditional update so each runs once. A running job
+    is owned by its process, which refreshes its heartbeat while a worker is
+    still running it; a job whose
+    heartbeat is older than stale_after seconds is assumed lost with its
+    process and queued again. Callbacks are delivered by a separate thread
+    pool so retries do not hold up job workers.
+    """
+
+    def __init__(self, db_path, handler=None, workers=4, poll_interval=1.0,
+                 callback_timeout=10, callback_retries=3, retention=86400, stale_after=120,
+                 callback_hosts=(), callback_workers=2):
+        self.db_path = db_path
+        self.handler = handler
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.callback_timeout = callback_timeout
+        self.callback_retries = callback_retries
+        self.retention = retention
+        self.stale_after = stale_after
+        self.callback_hosts = tuple(host.lower() for host in callback_hosts)
+        self.callback_workers = callback_workers
+        self.owner = uuid.uuid4().hex
+        self._db = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._threads = []
+        self._active = set()
+        self._callbacks = None
+        self._opener = urllib.request.build_opener(_NoRedirect)
+
+    def _connection(self):
+        """Return the database connection, opening it on first use. Call with the lock held."""
+        if self._db is None:
+            db = sqlite3.connect(self.db_path, check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs "
+                "(id TEXT PRIMARY KEY, status TEXT NOT NULL, request TEXT NOT NULL, "
+                "result TEXT, error TEXT, callback_url TEXT, callback_status TEXT, "
+                "created REAL NOT NULL, started REAL, finished REAL, owner TEXT, heartbeat REAL)"
+            )
+            # Databases created before jobs had owners
+            columns = {row[1] for row in db.execute("PRAGMA table_info(jobs)")}
+            for column, column_type in (("owner", "TEXT"), ("heartbeat", "REAL")):
+                if column not in columns:
+                    db.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+            db.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created)")
+            db.commit()
+            self._db = db
+        return self._db
+
+    def start(self):
+        """Start the worker, heartbeat and callback threads if they are not running yet."""
+        with self._lock:
+            if self._threads:
+                return
+            self._connection()
+            self._callbacks = ThreadPoolExecutor(self.callback_workers, thread_name_prefix="job-callback")
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            heartbeat = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+            heartbeat.start()
+
+    def submit(self, request, callback_url=None):
+        """Queue a job and return its id. It runs once a process sharing the database has called start()."""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            db = self._connection()
+            db.execute(
+                "INSERT INTO jobs (id, status, request, callback_url, created) VALUES (?, ?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(request), callback_url, time.time())
+            )
+            db.commit()
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id):
+        """Return a job as a dict, or None if it does not exist."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT id, status, result, error, callback_url, callback_status, created, started, finished "
+                "FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = {"job_id": row[0], "status": row[1], "created": row[6], "started": row[7], "finished": row[8]}
+        if row[2] is not None:
+            job["result"] = json.loads(row[2])
+        if row[3] is not None:
+            job["error"] = row[3]
+        if row[4]:
+            job["callback_status"] = row[5]
+        if row[1] == QUEUED:
+            job["queue_position"] = self._queue_position(row[6])
+        return job
+
+    def _queue_position(self, created):
+        with self._lock:
+            return self._connection().execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ? AND created < ?", (QUEUED, created)
+            ).fetchone()[0] + 1
+
+    def _claim(self):
+        """Mark the oldest queued job as running and return (id, request), or None."""
+        with self._lock:
+            db = self._connection()
+            while True:
+                row = db.execute(
+                    "SELECT id, request FROM jobs WHERE status = ? ORDER BY created LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row is None:
+                    return None
+                now = time.time()
+                claimed = db.execute(
+                    "UPDATE jobs SET status = ?, started = ?, owner = ?, heartbeat = ? WHERE id = ? AND status = ?",
+                    (RUNNING, now, self.owner, now, row[0], QUEUED)
+                ).rowcount
+                db.commit()
+                # Another process may have claimed it first
+                if claimed:
+                    self._active.add(row[0])
+                    return row[0], json.loads(row[1])
+
+    def _work(self):
+        while True:
+            job = self._claim()
+            if job is None:
+                self._housekeeping()
+                with self._wakeup:
+                    self._wakeup.wait(self.poll_interval)
+                continue
+
+            job_id, request = job
+            result, error = None, None
+            try:
+                result = self.handler(request)
+            except Exception as e:
+                error = str(e)
+            try:
+                self._finish(job_id, result, error)
+            except Exception as e:
+                # An unserializable result or a database error must not end the worker thread
+                try:
+                    self._finish(job_id, None, f"Could not store the job result: {e}")
+                except Exception:
+                    pass
+            finally:
+                # No longer heartbeated, so a job that could not be finished is requeued after stale_after
+                with self._lock:
+                    self._active.discard(job_id)
+
+    def _finish(self, job_id, result, error):
+        status = FAILED if error is not None else DONE
+        result = json.dumps(result) if error is None else None
+        with self._lock:
+            db = self._connection()
+            try:
+                updated = db.execute(
+                    "UPDATE jobs SET status = ?, result = ?, error = ?, finished = ?, "
+                    "callback_status = CASE WHEN callback_url IS NULL THEN NULL ELSE 'pending' END "
+                    "WHERE id = ? AND owner = ?",
+                    (status, result, error, time.time(), job_id, self.owner)
+                ).rowcount
+                db.commit()
+            except sqlite3.Error:
+                db.rollback()
+                raise
+            # The job was requeued and claimed elsewhere; that run reports the result
+            if not updated:
+                return
+            callback_url = db.execute("SELECT callback_url FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+        if callback_url:
+            self._callbacks.submit(self._send_callback, job_id, callback_url)
+
+    def _heartbeat(self):
+        """Keep jobs this process's workers are still running from being requeued as stale."""
+        while True:
+            time.sleep(self.stale_after / 4)
+            with self._lock:
+                if not self._active:
+                    continue
+                active = list(self._active)
+                db = self._connection()
+                try:
+                    db.execute(
+                        f"UPDATE jobs SET heartbeat = ? WHERE status = ? AND owner = ? "
+                        f"AND id IN ({', '.join('?' * len(active))})",
+                        (time.time(), RUNNING, self.owner, *active)
+                    )
+                    db.commit()
+                except sqlite3.Error:
+                    db.rollback()
+
+    def _send_callback(self, job_id, callback_url):
+        """POST the finished job to its callback URL, retrying with backoff."""
+        body = json.dumps(self.get(job_id)).encode("utf-8")
+        callback_status = "failed"
+        # Checked again at delivery, since DNS may have changed since the job was submitted
+        if valid_callback_url(callback_url, self.callback_hosts):
+            for attempt in range(self.callback_retries):
+                try:
+                    req = urllib.request.Request(callback_url, data=body, headers={"Content-Type": "application/json"})
+                    self._opener.open(req, timeout=self.callback_timeout).read()
+                    callback_status = "delivered"
+                    break
+                except Exception:
+                    if attempt + 1 < self.callback_retries:
+                        time.sleep(2 ** attempt)
+        else:
+            callback_status = "rejected"
+        with self._lock:
+            db = self._connection()
+            db.execute("UPDATE jobs SET callback_status = ? WHERE id = ?", (callback_status, job_id))
+            db.commit()
+
+    def _housekeeping(self):
+        """Requeue running jobs whose owner stopped heartbeating and delete old finished jobs."""
+        now = time.time()
+        with self._lock:
+            db = self._connection()
+            db.execute(
+                "UPDATE jobs SET status = ?, started = NULL, owner = NULL WHERE status = ? "
+                "AND COALESCE(heartbeat, started) < ?",
+                (QUEUED, RUNNING, now - self.stale_after)
+            )
+            db.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished < ?",
+                (DONE, FAILED, now - self.retention)
+            )
+            db.commit()
+
+    def stats(self):
+        """Return job counts by status and the worker pool size."""
+        with self._lock:
+            counts = dict(self._connection().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {
+            "jobs": {status: counts.get(status, 0) for status in STATUSES},
+            "workers": self.workers,
+            "running_workers": len(self._threads)
+        }
+
+
+# Shared queue for the Flask backend; backend.py sets the handler and its server entry points start it
+job_queue = JobQueue(
+    os.getenv("JOB_DB", "jobs.db"),
+    workers=int(os.getenv("JOB_WORKERS", "4")),
+    callback_timeout=float(os.getenv("JOB_CALLBACK_TIMEOUT", "10")),
+    retention=float(os.getenv("JOB_RETENTION", "86400")),
+    stale_after=float(os.getenv("JOB_STALE_AFTER", "120")),
+    callback_hosts=[host.strip() for host in os.getenv("JOB_CALLBACK_HOSTS", "").split(",") if host.strip()]
+)
@@ -0,0 +1,273 @@
+"""
+Hot-path latency and size instrumentation for the AI Sales Coach.
+Each analysis records per-stage timings, prompt and response sizes and token
+counts, labelled by analysis type and methodology. The data is kept in
+in-process histograms rendered in the Prometheus text format for /metrics,
+so p50/p95/p99 per stage can be computed with histogram_quantile().
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+from prompt_builder import ANALYSIS_PROMPTS, estimate_tokens, normalize_methodology
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+SIZE_BUCKETS = (100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000, 1000000)
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram with labels."""
+
+    def __init__(self, name, documentation, label_names, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        """Record one observation for a label combination."""
+        key = tuple(labels[name] for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def quantile(self, q, **labels):
+        """Estimate a quantile from the buckets, as histogram_quantile() would."""
+        key = tuple(labels[name] for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if not series or not series["count"]:
+                return None
+            rank = q * series["count"]
+            lower = 0.0
+            previous = 0
+            for bound, cumulative in zip(self.buckets, series["counts"]):
+                if cumulative >= rank:
+                    in_bucket = cumulative - previous
+                    fraction = (rank - previous) / in_bucket if in_bucket else 0.0
+                    return lower + (bound - lower) * fraction
+                lower, previous = bound, cumulative
+            return self.buckets[-1]
+
+    def label_sets(self):
+        """Return the label combinations observed so far."""
+        with self._lock:
+            return [dict(zip(self.label_names, key)) for key in self._series]
+
+    def render(self):
+        """Return the histogram in the Prometheus text exposition format."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                labels = ",".join(f'{name}="{value}"' for name, value in zip(self.label_names, key))
+                for bound, count in zip(self.buckets, series["counts"]):
+                    lines.append(f'{self.name}_bucket{{{labels},le="{bound:g}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {series["count"]}')
+                lines.append(f"{self.name}_sum{{{labels}}} {series['sum']:.6f}")
+                lines.append(f"{self.name}_count{{{labels}}} {series['count']}")
+        return "\n".join(lines)
+
+
+LABELS = ("analysis_type", "methodology")
+
+# analysis_type label values; "combined" marks single-pass multi-type analyses
+ANALYSIS_LABEL_VALUES = set(ANALYSIS_PROMPTS) | {"combined"}
+
+STAGE_SECONDS = Histogram(
+    "sales_coach_stage_seconds", "Time spent in each stage of an analysis request.",
+    ("stage",) + LABELS, LATENCY_BUCKETS
+)
+PROMPT_CHARS = Histogram("sales_coach_prompt_chars", "Size of prompts sent to the model.", LABELS, SIZE_BUCKETS)
+PROMPT_TOKENS = Histogram("sales_coach_prompt_tokens", "Estimated prompt tokens.", LABELS, SIZE_BUCKETS)
+RESPONSE_CHARS = Histogram("sales_coach_response_chars", "Size of model responses.", LABELS, SIZE_BUCKETS)
+RESPONSE_TOKENS = Histogram("sales_coach_response_tokens", "Estimated response tokens.", LABELS, SIZE_BUCKETS)
+TOKENS_SAVED = Histogram(
+    "sales_coach_compaction_tokens_saved", "Estimated conversation tokens removed by compaction.", LABELS, SIZE_BUCKETS
+)
+
+HISTOGRAMS = [STAGE_SECONDS, PROMPT_CHARS, PROMPT_TOKENS, RESPONSE_CHARS, RESPONSE_TOKENS, TOKENS_SAVED]
+
+# Extra collectors returning [(name, type, help, value)] for counters kept elsewhere
+_collectors = []
+
+_current_timer = contextvars.ContextVar("current_request_timer", default=None)
+
+
+class RequestTimer:
+    """Per-request stage timings and sizes, flushed to the histograms on finish."""
+
+    def __init__(self, analysis_type="general", methodology="none"):
+        self.stages = {}
+        self.sizes = {}
+        self.tokens_saved = None
+        # Window and fallback threads of one request record stages concurrently
+        self._lock = threading.Lock()
+        self.set_labels(analysis_type, methodology)
+
+    def set_labels(self, analysis_type, methodology):
+        """Set the labels, normalized so user input cannot create new series."""
+        known = isinstance(analysis_type, str) and analysis_type in ANALYSIS_LABEL_VALUES
+        self.analysis_type = analysis_type if known else "general"
+        self.methodology = normalize_methodology(methodology) or "none"
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block of code as a named stage (repeated and concurrent stages add up)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    def record_text(self, kind, text):
+        """Record the size and estimated token count of a prompt or response."""
+        self.sizes[kind] = (len(text), estimate_tokens(text))
+
+    def record_tokens_saved(self, tokens):
+        """Record estimated prompt tokens removed by compaction."""
+        self.tokens_saved = (self.tokens_saved or 0) + tokens
+
+    def finish(self):
+        labels = {"analysis_type": self.analysis_type, "methodology": self.methodology}
+        for name, seconds in self.stages.items():
+            STAGE_SECONDS.observe(seconds, stage=name, **labels)
+        if "prompt" in self.sizes:
+            PROMPT_CHARS.observe(self.sizes["prompt"][0], **labels)
+            PROMPT_TOKENS.observe(self.sizes["prompt"][1], **labels)
+        if "response" in self.sizes:
+            RESPONSE_CHARS.observe(self.sizes["response"][0], **labels)
+            RESPONSE_TOKENS.observe(self.sizes["response"][1], **labels)
+        if self.tokens_saved is not None:
+            TOKENS_SAVED.observe(self.tokens_saved, **labels)
+
+    def server_timing(self):
+        """Return the stage timings as a Server-Timing header value."""
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items())
+
+
+@contextmanager
+def request_timer(analysis_type="general", methodology="none", separate=False):
+    """Track one analysis request.
+
+    Nested calls (e.g. get_ai_feedback inside an instrumented route) reuse
+    the outer timer, so every stage lands in the same request. With
+    separate=True a new timer is started anyway, for sub-analyses that are
+    recorded as requests of their own.
+    """
+    timer = _current_timer.get()
+    if timer is not None and not separate:
+        yield timer
+        return
+
+    timer = RequestTimer(analysis_type, methodology)
+    token = _current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _current_timer.reset(token)
+        timer.finish()
+
+
+@contextmanager
+def using_timer(timer):
+    """Make timer the current request's timer inside the block.
+
+    Streaming generators use this around the code between their yields, so
+    the timer does not leak into the consumer's context.
+    """
+    token = _current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _current_timer.reset(token)
+
+
+@contextmanager
+def stage(name):
+    """Time a stage of the current request; a no-op outside a request."""
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    with timer.stage(name):
+        yield
+
+
+def current_timer():
+    """Return the active RequestTimer, or None."""
+    return _current_timer.get()
+
+
+def register_collector(collector):
+    """Add a function returning extra (name, type, help, value) samples for /metrics."""
+    _collectors.append(collector)
+
+
+def render_metrics():
+    """Return every metric in the Prometheus text exposition format."""
+    parts = [histogram.render() for histogram in HISTOGRAMS]
+    for collector in _collectors:
+        for name, metric_type, documentation, value in collector():
+            parts.append(f"# HELP {name} {documentation}\n# TYPE {name} {metric_type}\n{name} {value}")
+    return "\n".join(parts) + "\n"
+
+
+def stage_percentiles(quantiles=(0.5, 0.95, 0.99)):
+    """Return estimated stage latency percentiles in milliseconds, per label set."""
+    summary = {}
+    for labels in STAGE_SECONDS.label_sets():
+        key = f"{labels['stage']} [{labels['analysis_type']}/{labels['methodology']}]"
+        summary[key] = {
+            f"p{int(q * 100)}": round(STAGE_SECONDS.quantile(q, **labels) * 1000, 1)
+            for q in quantiles
+        }
+    return summary
+
+
+def _runtime_counters():
+    import compaction
+    from model_router import model_router
+    from response_cache import response_cache
+    from scheduler import scheduler
+    from semantic_cache import semantic_cache
+    from single_flight import single_flight
+
+    cache = response_cache.stats()
+    flights = single_flight.stats()
+    queue = scheduler.stats()
+    semantic = semantic_cache.stats()
+    compacted = compaction.stats()
+    routing = model_router.stats()
+    return [
+        ("sales_coach_cache_hits_total", "counter", "Response cache hits.", cache["hits"]),
+        ("sales_coach_cache_misses_total", "counter", "Response cache misses.", cache["misses"]),
+        ("sales_coach_cache_entries", "gauge", "Responses held in the in-memory cache.", cache["entries"]),
+        ("sales_coach_semantic_cache_hits_total", "counter", "Near-duplicate cache hits.", semantic["hits"]),
+        ("sales_coach_semantic_cache_misses_total", "counter", "Near-duplicate cache misses.", semantic["misses"]),
+        ("sales_coach_upstream_calls_total", "counter", "Model calls started after coalescing.", flights["upstream_calls"]),
+        ("sales_coach_coalesced_requests_total", "counter", "Requests that shared an in-flight model call.", flights["coalesced"]),
+        ("sales_coach_model_queue_depth", "gauge", "Model calls waiting in the scheduler queue.", queue["queue_depth"]),
+        ("sales_coach_model_retries_total", "counter", "Model calls retried after a retryable error.", queue["retries"]),
+        ("sales_coach_model_rejected_total", "counter", "Model calls rejected because the queue was full.", queue["rejected"]),
+        ("sales_coach_model_deadline_expired_total", "counter", "Model calls that missed their deadline.", queue["deadline_expired"]),
+        ("sales_coach_compaction_tokens_saved_total", "counter", "Estimated prompt tokens removed by compaction.", compacted["tokens_saved"]),
+        ("sales_coach_model_escalations_total", "counter", "Routed analyses sent to the large model.", sum(routing["escalations"].values())),
+        ("sales_coach_model_hedges_total", "counter", "Routed model calls raced against a second model.", routing["hedges"]),
+        ("sales_coach_model_cost_usd_total", "counter", "Estimated cost of routed model calls in USD.",
+         round(sum(model["cost_usd"] for model in routing["models"].values()), 6))
+    ]
+
+
+register_collector(_runtime_counters)
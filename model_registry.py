@@ -0,0 +1,119 @@
+"""
+Process-wide registry of Gemini model clients.
+Each named model config is turned into a client once and then reused by every
+request. The underlying API client and its connections are shared across all
+of them. Clients can optionally be pre-warmed at server start so the first
+real request does not pay the connection setup cost.
+"""
+
+import os
+import threading
+import time
+
+import google.generativeai as genai
+
+from fake_model import FakeGenerativeModel, use_fake_model
+
+# Named model configurations
+MODEL_CONFIGS = {
+    "default": {"model_name": "gemini-1.5-pro"},
+    "streamlit": {"model_name": "gemini-pro"},
+    # Cheaper, faster model tried first when MODEL_ROUTING=1 (see model_router.py)
+    "fast": {"model_name": "gemini-1.5-flash"}
+}
+
+
+class ModelRegistry:
+    """Create model clients once per process and hand out the shared instances."""
+
+    def __init__(self, configs):
+        self._configs = {name: dict(config) for name, config in configs.items()}
+        self._models = {}
+        self._lock = threading.Lock()
+        self._configured = False
+        self.created = 0
+        self.reused = 0
+        self.warmup_ms = {}
+
+    def configure(self):
+        """Configure the Gemini API key once per process."""
+        with self._lock:
+            self._configure_locked()
+
+    def _configure_locked(self):
+        if not self._configured:
+            api_key = os.getenv("GOOGLE_API_KEY")
+            if not api_key:
+                raise RuntimeError("GOOGLE_API_KEY is not set. Add it to .env, or set USE_FAKE_MODEL=1 to use the fake model.")
+            genai.configure(api_key=api_key)
+            self._configured = True
+
+    def register(self, name, model_name, generation_config=None):
+        """Add or replace a named model config."""
+        with self._lock:
+            self._configs[name] = {"model_name": model_name, "generation_config": generation_config}
+            self._models.pop(name, None)
+
+    def model_name(self, name="default"):
+        """Return the model name behind a config, used in cache keys."""
+        return self._configs[name]["model_name"]
+
+    def get(self, name="default"):
+        """Return the shared client for a named config, creating it on first use."""
+        model = self._models.get(name)
+        if model is not None:
+            self.reused += 1
+            return model
+
+        with self._lock:
+            model = self._models.get(name)
+            if model is None:
+                model = self._create_locked(name)
+                self._models[name] = model
+                self.created += 1
+            return model
+
+    def _create_locked(self, name):
+        config = self._configs[name]
+        if use_fake_model():
+            return FakeGenerativeModel(config["model_name"])
+        self._configure_locked()
+        return genai.GenerativeModel(
+            config["model_name"],
+            generation_config=config.get("generation_config")
+        )
+
+    def warm(self, names=None, ping=True):
+        """Create clients ahead of time and optionally open their connections.
+
+        With ping=True a count_tokens call is made per model, which sets up
+        the API connection without spending generation quota. Failures are
+        recorded but do not stop the server from starting.
+        """
+        for name in names or list(self._configs):
+            start = time.perf_counter()
+            try:
+                model = self.get(name)
+                if ping:
+                    model.count_tokens("ping")
+                self.warmup_ms[name] = round((time.perf_counter() - start) * 1000, 1)
+            except Exception as e:
+                self.warmup_ms[name] = f"failed: {e}"
+
+    def stats(self):
+        """Return client creation and reuse counters."""
+        return {
+            "models": sorted(self._models),
+            "created": self.created,
+            "reused": self.reused,
+            "warmup_ms": dict(self.warmup_ms)
+        }
+
+
+def prewarm_enabled():
+    """Return True when servers should warm their models at startup."""
+    return os.getenv("PREWARM_MODELS", "0") == "1"
+
+
+# Shared registry used by the Flask backend, the async server and the Streamlit app
+model_registry = ModelRegistry(MODEL_CONFIGS)
@@ -0,0 +1,366 @@
+"""
+Model routing for analyses.
+With MODEL_ROUTING=1, an analysis goes to the fast model (gemini-1.5-flash)
+first. It goes straight to the large model when its prompt is too long for
+the fast model under that analysis type's rule. A fast answer that looks
+weak (too short, unstructured or hedging) is escalated to the large model.
+A call that has not answered within the rule's hedge deadline is raced
+against the other model, and the first answer wins. Latency, estimated
+tokens and cost are accounted per model.
+"""
+
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from metrics import stage
+from model_registry import model_registry
+from prompt_builder import estimate_tokens
+from scheduler import DeadlineExceededError, current_call_options, scheduler
+
+# Registry config of the fast, cheap model
+FAST_MODEL_CONFIG = "fast"
+
+# Routing rules per analysis type ("combined" for single-pass multi-type analyses):
+#   fast_max_tokens     prompts estimated above this go straight to the large model (0: always large)
+#   min_response_chars  shorter fast answers count as weak
+#   min_confidence      fast answers scoring below this are escalated
+#   hedge_after         seconds before the other model is tried as well (0: no hedging)
+DEFAULT_RULE = {"fast_max_tokens": 3000, "min_response_chars": 200, "min_confidence": 0.6, "hedge_after": 20}
+ROUTING_RULES = {
+    "general": {},
+    "objections": {"fast_max_tokens": 2000},
+    "closing": {},
+    "rapport": {},
+    "pitch": {"fast_max_tokens": 2000},
+    "combined": {"fast_max_tokens": 0}
+}
+
+# USD per million input and output tokens, for cost accounting
+MODEL_PRICES = {
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-pro": (1.25, 5.00),
+    "gemini-pro": (0.50, 1.50)
+}
+
+STRUCTURE_PATTERN = re.compile(r"^\s*(?:#+ |[-*] |\d+\. )", re.MULTILINE)
+HEDGE_PATTERN = re.compile(
+    r"\b(?:i(?:'m| am) not sure|i cannot|i can't|unable to|not enough information|as an ai)\b", re.IGNORECASE
+)
+
+
+def routing_enabled():
+    """Return True when analyses should be routed between the fast and large models."""
+    return os.getenv("MODEL_ROUTING", "0") == "1"
+
+
+def cache_model_name(model_name):
+    """Return the model name responses are cached under.
+
+    Routed responses may come from the fast model, so they get their own
+    cache namespace and are never served as the large model's answers.
+    """
+    return f"router:{model_name}" if routing_enabled() else model_name
+
+
+def _deadline(timeout):
+    """Return the monotonic deadline for a call, with timeout defaulting to call_options()."""
+    timeout = current_call_options()[1] if timeout is None else timeout
+    return time.monotonic() + timeout if timeout else None
+
+
+def _remaining(deadline):
+    """Return the seconds left before deadline (None without one), never 0 since that means no timeout."""
+    return None if deadline is None else max(deadline - time.monotonic(), 0.001)
+
+
+def _expired(deadline):
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def _first_timeout(hedge_after, deadline):
+    """Return how long to wait for the first model: until the hedge or the deadline, whichever is sooner."""
+    timeouts = [t for t in (hedge_after or None, _remaining(deadline)) if t is not None]
+    return min(timeouts) if timeouts else None
+
+
+async def _within(coroutine, deadline):
+    """Await coroutine, raising DeadlineExceededError if it has not finished by the deadline."""
+    try:
+        return await asyncio.wait_for(coroutine, _remaining(deadline))
+    except asyncio.TimeoutError:
+        raise DeadlineExceededError("Deadline exceeded while waiting for the model") from None
+
+
+def confidence(text, min_chars):
+    """Score a response from 0 to 1 on length, markdown structure and absence of hedging."""
+    score = 1.0
+    if len(text.strip()) < min_chars:
+        score -= 0.5
+    if not STRUCTURE_PATTERN.search(text):
+        score -= 0.3
+    if HEDGE_PATTERN.search(text):
+        score -= 0.4
+    return max(score, 0.0)
+
+
+class ModelRouter:
+    """Pick a model per prompt, escalate weak answers, hedge slow calls, and account per model."""
+
+    def __init__(self, rules, fast_config=FAST_MODEL_CONFIG, prices=None):
+        self.rules = rules
+        self.fast_config = fast_config
+        self.prices = prices or {}
+        self._lock = threading.Lock()
+        self._models = {}
+        self.routed = {"fast": 0, "large": 0}
+        self.escalations = {"length": 0, "confidence": 0}
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def rule(self, analysis_type):
+        """Return the routing rule for an analysis type, with defaults filled in."""
+        return dict(DEFAULT_RULE, **self.rules.get(analysis_type, {}))
+
+    def select(self, prompt, analysis_type, large_config):
+        """Return the registry config to try first for a prompt."""
+        limit = self.rule(analysis_type)["fast_max_tokens"]
+        if not limit:
+            self._count(self.routed, "large")
+            return large_config
+        if estimate_tokens(prompt) > limit:
+            self._count(self.escalations, "length")
+            self._count(self.routed, "large")
+            return large_config
+        self._count(self.routed, "fast")
+        return self.fast_config
+
+    def generate(self, prompt, analysis_type, large_config, timeout=None):
+        """Return the response text for a prompt, routed through the scheduler.
+
+        timeout is the deadline for the whole routed call, escalation and
+        hedging included, and defaults to the caller's call_options().
+        """
+        rule = self.rule(analysis_type)
+        deadline = _deadline(timeout)
+        first = self.select(prompt, analysis_type, large_config)
+        second = large_config if first == self.fast_config else self.fast_config
+        text, used = self._hedged(prompt, first, second, rule["hedge_after"], deadline)
+        if used == self.fast_config and confidence(text, rule["min_response_chars"]) < rule["min_confidence"]:
+            self._count(self.escalations, "confidence")
+            with stage('model'):
+                text = scheduler.call(lambda: self._call(large_config, prompt), timeout=_remaining(deadline))
+        return text
+
+    async def generate_async(self, prompt, analysis_type, large_config, timeout=None):
+        """Async variant of generate() for the event-loop server."""
+        rule = self.rule(analysis_type)
+        deadline = _deadline(timeout)
+        first = self.select(prompt, analysis_type, large_config)
+        second = large_config if first == self.fast_config else self.fast_config
+        text, used = await self._hedged_async(prompt, first, second, rule["hedge_after"], deadline)
+        if used == self.fast_config and confidence(text, rule["min_response_chars"]) < rule["min_confidence"]:
+            self._count(self.escalations, "confidence")
+            with stage('model'):
+                text = await _within(
+                    scheduler.call_async(lambda: self._call_async(large_config, prompt), timeout=_remaining(deadline)),
+                    deadline
+                )
+        return text
+
+    def stream(self, prompt, analysis_type, large_config, timeout=None):
+        """Yield response text chunks from the selected model, accounted once the stream ends.
+
+        A stream cannot be escalated or hedged once started, so only the
+        length rule applies. A stream closed early is accounted for the
+        text received so far.
+        """
+        config = self.select(prompt, analysis_type, large_config)
+        model = model_registry.get(config)
+        start = time.perf_counter()
+        chunks = []
+        failed = False
+        try:
+            # Only starting the stream is scheduled; chunks are read in the caller's thread
+            for chunk in scheduler.call(lambda: model.generate_content(prompt, stream=True), timeout=timeout):
+                chunks.append(chunk.text)
+                yield chunk.text
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._record(config, time.perf_counter() - start, prompt, None if failed else "".join(chunks))
+
+    def _hedged(self, prompt, first, second, hedge_after, deadline):
+        """Return (text, config) from the first model, or from whichever answers first once hedged.
+
+        Raises DeadlineExceededError when no model has answered by the deadline.
+        """
+        primary = scheduler.submit(lambda: self._call(first, prompt), timeout=_remaining(deadline))
+        with stage('model'):
+            done, _ = wait([primary], timeout=_first_timeout(hedge_after, deadline))
+            if done:
+                return primary.result(), first
+            if not hedge_after or _expired(deadline):
+                raise scheduler.abandon(primary)
+
+            self._count_hedge()
+            backup = scheduler.submit(lambda: self._call(second, prompt), timeout=_remaining(deadline))
+            pending = {primary: first, backup: second}
+            error = None
+            while pending:
+                done, _ = wait(list(pending), timeout=_remaining(deadline), return_when=FIRST_COMPLETED)
+                if not done:
+                    errors = [scheduler.abandon(future) for future in pending]
+                    raise errors[0]
+                for future in done:
+                    config = pending.pop(future)
+                    if future.exception() is None:
+                        # A loser still queued is dropped; one already running finishes unused
+                        for other in pending:
+                            scheduler.cancel(other)
+                        if future is backup:
+                            self._count_hedge(won=True)
+                        return future.result(), config
+                    error = future.exception()
+            raise error
+
+    async def _hedged_async(self, prompt, first, second, hedge_after, deadline):
+        primary = asyncio.ensure_future(
+            scheduler.call_async(lambda: self._call_async(first, prompt), timeout=_remaining(deadline))
+        )
+        with stage('model'):
+            done, _ = await asyncio.wait({primary}, timeout=_first_timeout(hedge_after, deadline))
+            if done:
+                return primary.result(), first
+            if not hedge_after or _expired(deadline):
+                primary.cancel()
+                raise DeadlineExceededError("Deadline exceeded while waiting for the model")
+
+            self._count_hedge()
+            backup = asyncio.ensure_future(
+                scheduler.call_async(lambda: self._call_async(second, prompt), timeout=_remaining(deadline))
+            )
+            pending = {primary: first, backup: second}
+            error = None
+            while pending:
+                done, _ = await asyncio.wait(set(pending), timeout=_remaining(deadline),
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    for task in pending:
+                        task.cancel()
+                    raise DeadlineExceededError("Deadline exceeded while waiting for the model")
+                for task in done:
+                    config = pending.pop(task)
+                    if task.exception() is None:
+                        for other in pending:
+                            other.cancel()
+                        if task is backup:
+                            self._count_hedge(won=True)
+                        return task.result(), config
+                    error = task.exception()
+            raise error
+
+    def _call(self, config, prompt):
+        model = model_registry.get(config)
+        start = time.perf_counter()
+        try:
+            text = model.generate_content(prompt).text
+        except Exception:
+            self._record(config, time.perf_counter() - start, prompt, None)
+            raise
+        self._record(config, time.perf_counter() - start, prompt, text)
+        return text
+
+    async def _call_async(self, config, prompt):
+        model = model_registry.get(config)
+        start = time.perf_counter()
+        try:
+            text = (await model.generate_content_async(prompt)).text
+        except Exception:
+            self._record(config, time.perf_counter() - start, prompt, None)
+            raise
+        self._record(config, time.perf_counter() - start, prompt, text)
+        return text
+
+    def _record(self, config, seconds, prompt, text):
+        """Account one model call; text is None for a failed call."""
+        name = model_registry.model_name(config)
+        input_tokens = estimate_tokens(prompt)
+        output_tokens = estimate_tokens(text) if text is not None else 0
+        input_price, output_price = self.prices.get(name, (0.0, 0.0))
+        with self._lock:
+            model = self._models.setdefault(name, {
+                "calls": 0, "errors": 0, "seconds": 0.0, "latencies_ms": [],
+                "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0
+            })
+            model["calls"] += 1
+            model["errors"] += text is None
+            model["seconds"] += seconds
+            model["input_tokens"] += input_tokens
+            model["output_tokens"] += output_tokens
+            model["cost_usd"] += (input_tokens * input_price + output_tokens * output_price) / 1e6
+            # Keep a bounded window of recent latencies for percentiles
+            model["latencies_ms"].append(seconds * 1000)
+            if len(model["latencies_ms"]) > 1000:
+                del model["latencies_ms"][:500]
+
+    def _count(self, counters, key):
+        with self._lock:
+            counters[key] += 1
+
+    def _count_hedge(self, won=False):
+        with self._lock:
+            if won:
+                self.hedge_wins += 1
+            else:
+                self.hedges += 1
+
+    def stats(self):
+        """Return routing decisions, escalations, hedges and per-model latency and cost."""
+        with self._lock:
+            models = {}
+            for name, model in self._models.items():
+                latencies = sorted(model["latencies_ms"])
+                models[name] = {
+                    "calls": model["calls"],
+                    "errors": model["errors"],
+                    "p50_ms": round(latencies[len(latencies) // 2], 1) if latencies else 0.0,
+                    "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1)
+                    if latencies else 0.0,
+                    "avg_ms": round(model["seconds"] / model["calls"] * 1000, 1),
+                    "input_tokens": model["input_tokens"],
+                    "output_tokens": model["output_tokens"],
+                    "cost_usd": round(model["cost_usd"], 6)
+                }
+            return {
+                "enabled": routing_enabled(),
+                "routed": dict(self.routed),
+                "escalations": dict(self.escalations),
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "models": models
+            }
+
+
+def _load_rules():
+    """Return ROUTING_RULES with overrides from MODEL_ROUTING_RULES (JSON, keyed by analysis type)."""
+    rules = {analysis_type: dict(rule) for analysis_type, rule in ROUTING_RULES.items()}
+    for analysis_type, rule in json.loads(os.getenv("MODEL_ROUTING_RULES") or "{}").items():
+        rules.setdefault(analysis_type, {}).update(rule)
+    return rules
+
+
+def _load_prices():
+    """Return MODEL_PRICES with overrides from MODEL_PRICES (JSON, {model: [input, output]})."""
+    prices = dict(MODEL_PRICES)
+    prices.update({name: tuple(price) for name, price in json.loads(os.getenv("MODEL_PRICES") or "{}").items()})
+    return prices
+
+
+# Shared router used by the Flask backend, the async server and the Streamlit app
+model_router = ModelRouter(_load_rules(), prices=_load_prices())
@@ -0,0 +1,279 @@
+"""
+Prompt construction for the AI Sales Coach.
+Every (analysis_type, methodology) prompt prefix is built once at import time
+from sales_methodologies.METHODOLOGIES, so a request only has to append the
+conversation to a ready-made string. With PROMPT_COMPACTION=1, compact
+prefixes are used instead (see compaction.py).
+"""
+
+import json
+import math
+import os
+import re
+
+from sales_methodologies import METHODOLOGIES
+
+# Rough characters-per-token ratio for English text with Gemini tokenizers
+CHARS_PER_TOKEN = 4
+
+# Base system prompt
+SYSTEM_PROMPT = """
+    You are an expert AI Sales Coach with deep knowledge of sales methodologies, techniques, and best practices.
+    You analyze sales conversations and provide specific, actionable feedback to help sales professionals improve.
+    Focus on being constructive and specific, providing examples of better approaches where possible.
+    Format your response with clear headers and bullet points for readability.
+    """
+
+# Type-specific prompts
+ANALYSIS_PROMPTS = {
+    "general": "Analyze this sales conversation and provide general feedback on effectiveness, engagement, and areas of improvement. Include 3-5 specific recommendations.",
+    "objections": "Analyze this sales conversation and identify objections raised by the customer. Provide specific strategies on how to better handle these objections. Include examples of improved responses.",
+    "closing": "Analyze this sales conversation and provide feedback on the closing techniques used. Suggest improvements for better conversion. Include specific examples of stronger closing approaches.",
+    "rapport": "Analyze this sales conversation and evaluate rapport building. Suggest ways to better connect with the customer. Provide examples of questions or statements that would improve relationship building.",
+    "pitch": "Analyze this sales conversation and evaluate the sales pitch. Provide feedback on value proposition and messaging. Include specific examples of how to better communicate value."
+}
+
+ANALYSIS_TYPES = list(ANALYSIS_PROMPTS.keys())
+
+# Display names for each analysis type
+ANALYSIS_LABELS = {
+    "general": "General Analysis",
+    "objections": "Objection Handling",
+    "closing": "Closing Techniques",
+    "rapport": "Rapport Building",
+    "pitch": "Sales Pitch Evaluation"
+}
+
+
+def methodology_section(methodology_info):
+    """Return the system prompt lines describing a methodology."""
+    lines = [
+        f"\n\nIncorporate principles from the {methodology_info['name']} methodology in your analysis:",
+        f"\n- Description: {methodology_info['description']}"
+    ]
+
+    if 'components' in methodology_info:
+        lines.append("\n- Key Components:")
+        lines.extend(f"\n  - {component}: {desc}" for component, desc in methodology_info['components'].items())
+
+    if 'key_principles' in methodology_info:
+        lines.append("\n- Key Principles:")
+        lines.extend(f"\n  - {principle}" for principle in methodology_info['key_principles'])
+
+    return "".join(lines)
+
+
+# Methodology components most relevant to each analysis type; other types get every component
+RELEVANT_COMPONENTS = {
+    "SPIN": {
+        "objections": ["Problem", "Implication"],
+        "closing": ["Need-Payoff"],
+        "rapport": ["Situation"],
+        "pitch": ["Implication", "Need-Payoff"]
+    },
+    "BANT": {
+        "objections": ["Budget", "Authority"],
+        "closing": ["Authority", "Timeline"],
+        "rapport": ["Need"],
+        "pitch": ["Need", "Budget"]
+    },
+    "CHALLENGER": {
+        "objections": ["Teach", "Take Control"],
+        "closing": ["Take Control"],
+        "rapport": ["Tailor"],
+        "pitch": ["Teach", "Tailor"]
+    },
+    "SOLUTION": {
+        "objections": ["Pain", "Value"],
+        "closing": ["Power", "Control"],
+        "rapport": ["Pain"],
+        "pitch": ["Vision", "Value"]
+    }
+}
+
+
+def compact_methodology_section(key, analysis_type):
+    """Return a shorter methodology section listing only the components relevant to analysis_type.
+
+    Key principles are only included for the general analysis.
+    """
+    info = METHODOLOGIES[key]
+    relevant = RELEVANT_COMPONENTS.get(key, {}).get(analysis_type, list(info.get("components", {})))
+    lines = [f"\nApply {info['name']}: {info['description']}"]
+    lines.extend(f"\n- {component}: {info['components'][component]}" for component in relevant)
+    if analysis_type == "general" and "key_principles" in info:
+        lines.extend(f"\n- {principle}" for principle in info["key_principles"])
+    return "".join(lines)
+
+
+def check_analysis_options(analysis_type, methodology):
+    """Raise ValueError unless analysis_type and methodology are strings."""
+    if not isinstance(analysis_type, str):
+        raise ValueError("analysis_type must be a string")
+    if methodology is not None and not isinstance(methodology, str):
+        raise ValueError("methodology must be a string")
+
+
+def normalize_methodology(methodology):
+    """Return the METHODOLOGIES key for a methodology name, or None.
+
+    Accepts None, 'none' and unknown names (all meaning no methodology) and is
+    case-insensitive, so both the API's 'SPIN' and lowercase input work.
+    """
+    if not methodology or not isinstance(methodology, str):
+        return None
+    key = methodology.upper()
+    return key if key in METHODOLOGIES else None
+
+
+def _build_system_prompts():
+    system_prompts = {None: SYSTEM_PROMPT}
+    for key, info in METHODOLOGIES.items():
+        system_prompts[key] = SYSTEM_PROMPT + methodology_section(info)
+    return system_prompts
+
+
+def _build_prefixes():
+    return {
+        (analysis_type, methodology): system_prompt + "\n\n" + analysis_prompt + "\n\n"
+        for methodology, system_prompt in SYSTEM_PROMPTS.items()
+        for analysis_type, analysis_prompt in ANALYSIS_PROMPTS.items()
+    }
+
+
+# The system prompt without its source-code indentation
+COMPACT_SYSTEM_PROMPT = "\n".join(line.strip() for line in SYSTEM_PROMPT.strip().splitlines())
+
+
+def _build_compact_system_prompts():
+    system_prompts = {None: COMPACT_SYSTEM_PROMPT}
+    for key in METHODOLOGIES:
+        system_prompts[key] = COMPACT_SYSTEM_PROMPT + compact_methodology_section(key, "general")
+    return system_prompts
+
+
+def _build_compact_prefixes():
+    return {
+        (analysis_type, methodology): COMPACT_SYSTEM_PROMPT
+        + (compact_methodology_section(methodology, analysis_type) if methodology else "")
+        + "\n\n" + analysis_prompt + "\n\n"
+        for methodology in [None] + list(METHODOLOGIES)
+        for analysis_type, analysis_prompt in ANALYSIS_PROMPTS.items()
+    }
+
+
+# System prompts keyed by methodology key (or None)
+SYSTEM_PROMPTS = _build_system_prompts()
+
+# Precomputed prompt prefixes keyed by (analysis_type, methodology key or None)
+PROMPT_PREFIXES = _build_prefixes()
+
+# Compact variants used when PROMPT_COMPACTION=1
+COMPACT_SYSTEM_PROMPTS = _build_compact_system_prompts()
+COMPACT_PREFIXES = _build_compact_prefixes()
+
+# Compact conversations and prompt prefixes before analysis (read once, since prefix lookups are per request)
+PROMPT_COMPACTION = os.getenv("PROMPT_COMPACTION", "0") == "1"
+
+
+def prompt_compaction_enabled():
+    """Return True when prompts should be compacted before they are sent."""
+    return PROMPT_COMPACTION
+
+
+def get_prompt_prefix(analysis_type, methodology=None):
+    """Return the static prompt prefix for an analysis type and methodology.
+
+    Unknown analysis types fall back to the general analysis.
+    """
+    if analysis_type not in ANALYSIS_PROMPTS:
+        analysis_type = "general"
+    prefixes = COMPACT_PREFIXES if PROMPT_COMPACTION else PROMPT_PREFIXES
+    return prefixes[(analysis_type, normalize_methodology(methodology))]
+
+
+def build_prompt(conversation, analysis_type, methodology=None):
+    """Return the complete prompt for a conversation."""
+    return get_prompt_prefix(analysis_type, methodology) + conversation
+
+
+def build_window_prompt(window, index, total, analysis_type, methodology=None):
+    """Return the prompt for one excerpt of a long conversation."""
+    note = (f"This is excerpt {index} of {total} from one long sales conversation. "
+            "Analyze only this excerpt; the analyses will be merged afterwards.\n\n")
+    return get_prompt_prefix(analysis_type, methodology) + note + window
+
+
+def build_reduce_prompt(partial_feedback, analysis_type, methodology=None):
+    """Return the prompt that merges per-excerpt analyses into one report."""
+    sections = "\n\n".join(
+        f"--- Analysis of excerpt {i} of {len(partial_feedback)} ---\n{feedback}"
+        for i, feedback in enumerate(partial_feedback, start=1)
+    )
+    instruction = ("The conversation was too long to analyze in one pass, so each excerpt was analyzed separately. "
+                   "Merge the excerpt analyses below into a single report for the whole conversation. "
+                   "Remove duplicate points, keep the most specific examples, and follow the same format.\n\n")
+    return get_prompt_prefix(analysis_type, methodology) + instruction + sections
+
+
+def normalize_analysis_types(analysis_types):
+    """Return the known analysis types in a list, deduplicated and in ANALYSIS_TYPES order.
+
+    Raises ValueError for unknown or non-string types.
+    """
+    if not all(isinstance(t, str) for t in analysis_types):
+        raise ValueError("analysis_types must be a list of strings")
+    unknown = [t for t in analysis_types if t not in ANALYSIS_PROMPTS]
+    if unknown:
+        raise ValueError(f"Unknown analysis types: {', '.join(map(str, unknown))}")
+    return [t for t in ANALYSIS_TYPES if t in analysis_types]
+
+
+def build_combined_prompt(conversation, analysis_types, methodology=None):
+    """Return one prompt asking for several analysis types as a JSON object.
+
+    The response must be an object with one markdown string per analysis
+    type, which parse_combined_response() splits back apart.
+    """
+    schema = {
+        "type": "object",
+        "properties": {t: {"type": "string"} for t in analysis_types},
+        "required": list(analysis_types)
+    }
+    tasks = "\n".join(f'- "{t}": {ANALYSIS_PROMPTS[t]}' for t in analysis_types)
+    instruction = ("Provide each of the following analyses of this sales conversation:\n"
+                   f"{tasks}\n\n"
+                   "Respond with only a JSON object matching this JSON schema, with no text before or after it. "
+                   "Each value is the complete markdown feedback for that analysis:\n"
+                   f"{json.dumps(schema)}\n\n")
+    system_prompts = COMPACT_SYSTEM_PROMPTS if PROMPT_COMPACTION else SYSTEM_PROMPTS
+    return system_prompts[normalize_methodology(methodology)] + "\n\n" + instruction + conversation
+
+
+CODE_FENCE_PATTERN = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", re.DOTALL)
+
+
+def parse_combined_response(text, analysis_types):
+    """Split a combined response into {analysis_type: feedback}.
+
+    Raises ValueError when the response is not a JSON object with a
+    non-empty string for every requested type.
+    """
+    fenced = CODE_FENCE_PATTERN.match(text)
+    if fenced:
+        text = fenced.group(1)
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Combined response is not valid JSON: {e}") from e
+    if not isinstance(data, dict):
+        raise ValueError("Combined response is not a JSON object")
+    missing = [t for t in analysis_types if not isinstance(data.get(t), str) or not data[t].strip()]
+    if missing:
+        raise ValueError(f"Combined response is missing analyses: {', '.join(missing)}")
+    return {t: data[t] for t in analysis_types}
+
+
+def estimate_tokens(text):
+    """Estimate the model token count of a string without calling the API."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
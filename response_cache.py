@@ -0,0 +1,238 @@
+"""
+Response cache for AI Sales Coach model calls.
+Entries are keyed on a hash of the fully built prompt and the model name, so
+re-analyzing the same conversation with the same options skips the model call.
+Results live in an in-memory LRU tier and, optionally, a SQLite tier that
+survives restarts. Writes to the SQLite tier sweep expired rows, and every
+TRIM_EVERY writes the oldest rows beyond max_db_rows are dropped.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from single_flight import single_flight
+
+# Writes between trims of the SQLite tier to max_db_rows; the table may overshoot by this many rows
+TRIM_EVERY = 100
+
+
+class ResponseCache:
+    """Two-tier (memory LRU + optional SQLite) cache of model responses."""
+
+    def __init__(self, max_entries=256, ttl_seconds=3600, db_path=None, max_db_rows=10000):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_db_rows = max_db_rows
+        self.db_path = db_path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.bypasses = 0
+
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses (created)")
+            self._db.commit()
+
+    @staticmethod
+    def make_key(prompt, model_name):
+        """Return the cache key for a prompt sent to a given model."""
+        digest = hashlib.sha256()
+        digest.update(model_name.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(prompt.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _expired(self, created):
+        return self.ttl_seconds is not None and time.time() - created > self.ttl_seconds
+
+    def get(self, key):
+        """Return the cached response for a key, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, created = entry
+                if not self._expired(created):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, created = row
+                    if not self._expired(created):
+                        self._store_in_memory(key, value, created)
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return value
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        """Store a response under a key in every configured tier."""
+        created = time.time()
+        with self._lock:
+            self._store_in_memory(key, value, created)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, created) VALUES (?, ?, ?)",
+                    (key, value, created)
+                )
+                self._sweep_db(created)
+                self._db.commit()
+
+    def _sweep_db(self, now):
+        """Delete expired rows and, on the first of every TRIM_EVERY writes, the oldest beyond max_db_rows."""
+        if self.ttl_seconds is not None:
+            self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+        if self.max_db_rows and self._db_writes % TRIM_EVERY == 0:
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                (self.max_db_rows,)
+            )
+        self._db_writes += 1
+
+    def _store_in_memory(self, key, value, created):
+        self._entries[key] = (value, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def record_bypass(self):
+        """Count a request that skipped the lookup."""
+        with self._lock:
+            self.bypasses += 1
+
+    def clear(self):
+        """Drop every cached response and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+            self.hits = self.misses = self.disk_hits = self.bypasses = 0
+
+    def stats(self):
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "bypasses": self.bypasses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "max_db_rows": self.max_db_rows,
+                "persistent": self._db is not None
+            }
+
+
+def _ttl_from_env():
+    ttl = os.getenv("RESPONSE_CACHE_TTL", "3600")
+    return float(ttl) if float(ttl) > 0 else None
+
+
+# Shared cache used by both the Flask backend and the Streamlit app
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "256")),
+    ttl_seconds=_ttl_from_env(),
+    db_path=os.getenv("RESPONSE_CACHE_DB") or None,
+    max_db_rows=int(os.getenv("RESPONSE_CACHE_DB_ROWS", "10000"))
+)
+
+
+def cached_generate(prompt, model_name, generate, use_cache=True, cache=None):
+    """Return generate(prompt), reusing a cached response when possible.
+
+    Passing use_cache=False bypasses the lookup but still stores the fresh
+    response so later requests can reuse it. Concurrent calls with the same
+    key are coalesced into one generate() call.
+    """
+    cache = cache or response_cache
+    key = cache.make_key(prompt, model_name)
+
+    if use_cache:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    else:
+        cache.record_bypass()
+
+    def call():
+        text = generate(prompt)
+        cache.set(key, text)
+        return text
+
+    # Identical concurrent requests share one upstream call
+    return single_flight.do(key, call)
+
+
+async def cached_generate_async(prompt, model_name, generate_async, use_cache=True, cache=None):
+    """Async variant of cached_generate for coroutine-based model calls."""
+    cache = cache or response_cache
+    key = cache.make_key(prompt, model_name)
+
+    if use_cache:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    else:
+        cache.record_bypass()
+
+    async def call():
+        text = await generate_async(prompt)
+        cache.set(key, text)
+        return text
+
+    return await single_flight.do_async(key, call)
+
+
+def cached_stream(prompt, model_name, generate_stream, use_cache=True, cache=None):
+    """Yield text chunks from generate_stream(prompt), caching the full text.
+
+    A cache hit yields the stored response as a single chunk. The response is
+    only stored once the stream has completed. Concurrent streams with the
+    same key share one generate_stream() call.
+    """
+    cache = cache or response_cache
+    key = cache.make_key(prompt, model_name)
+
+    if use_cache:
+        cached = cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+    else:
+        cache.record_bypass()
+
+    def stream():
+        chunks = []
+        for chunk in generate_stream(prompt):
+            chunks.append(chunk)
+            yield chunk
+        cache.set(key, "".join(chunks))
+
+    yield from single_flight.do_stream(key, stream)
@@ -1,6 +1,8 @@
 """
 Common sales methodologies and frameworks used in modern sales.
 These can be referenced by the AI Sales Coach when providing feedback.
+This module is the single source of methodology data for both the Flask
+backend and the Streamlit app (see prompt_builder.py).
 """
 
 METHODOLOGIES = {
@@ -90,13 +92,13 @@ METHODOLOGIES = {
     "SOLUTION": {
         "name": "Solution Selling",
         "description": "A sales methodology focused on solving customer problems rather than selling products.",
-        "stages": [
-            "Pain: Identify and develop customer pain points",
-            "Power: Find the people with authority and budget",
-            "Vision: Create a shared vision of the solution",
-            "Value: Establish clear ROI and business case",
-            "Control: Maintain control of the sales process"
-        ],
+        "components": {
+            "Pain": "Identify and develop customer pain points",
+            "Power": "Find the people with authority and budget",
+            "Vision": "Create a shared vision of the solution",
+            "Value": "Establish clear ROI and business case",
+            "Control": "Maintain control of the sales process"
+        },
         "key_principles": [
             "Focus on solving problems, not pitching products",
             "Position yourself as a consultant rather than a salesperson",
@@ -0,0 +1,361 @@
+"""
+Shared scheduler in front of every model call.
+Calls wait in a bounded priority queue (interactive UI requests ahead of batch
+jobs) and are dispatched by a fixed set of worker threads. A token bucket
+sized to the API quota paces them. Retryable errors (429 quota, 5xx, timeouts)
+are retried with jittered exponential backoff, and each call can carry a
+deadline after which it fails instead of waiting further.
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+
+# Priorities: lower runs first
+INTERACTIVE = 0
+BATCH = 10
+
+
+# Priority and deadline applied to model calls made in the current context
+_call_options = contextvars.ContextVar("model_call_options", default=(INTERACTIVE, None))
+
+
+@contextmanager
+def call_options(priority=INTERACTIVE, timeout=None):
+    """Set the priority and deadline (seconds) for model calls made inside the block."""
+    token = _call_options.set((priority, timeout))
+    try:
+        yield
+    finally:
+        _call_options.reset(token)
+
+
+def current_call_options():
+    """Return the (priority, timeout) set for the current context."""
+    return _call_options.get()
+
+
+class QueueFullError(Exception):
+    """Raised when the scheduler queue is at capacity."""
+
+
+class DeadlineExceededError(Exception):
+    """Raised when a call cannot start or finish before its deadline."""
+
+
+class TokenBucket:
+    """Token bucket allowing `rate` calls per second with bursts up to `capacity`.
+
+    A rate of 0 disables the limit.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """Take a token if one is available; otherwise return seconds to wait."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def penalize(self):
+        """Drain the bucket after a quota error so every worker backs off together."""
+        with self._lock:
+            self.tokens = min(self.tokens, 0)
+
+
+def is_retryable(error):
+    """Return True for quota, server-side and timeout errors."""
+    code = getattr(error, 'code', None)
+    if callable(code):
+        code = code()
+    code = getattr(code, 'value', code)
+    if isinstance(code, tuple):
+        code = code[0]
+    if code in (429, 500, 502, 503, 504):
+        return True
+    return type(error).__name__ in (
+        'ResourceExhausted', 'ServiceUnavailable', 'InternalServerError',
+        'DeadlineExceeded', 'TooManyRequests', 'GatewayTimeout'
+    )
+
+
+def is_quota_error(error):
+    code = getattr(error, 'code', None)
+    return code == 429 or type(error).__name__ in ('ResourceExhausted', 'TooManyRequests')
+
+
+class ModelCallScheduler:
+    """Priority queue + worker pool + token bucket + retries for model calls."""
+
+    def __init__(self, rate_per_second, burst, max_queue, workers,
+                 max_retries=4, base_backoff=0.5, max_backoff=20.0):
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._heap = []
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._workers = [
+            threading.Thread(target=self._work, name=f"model-scheduler-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        # Async calls run on the caller's event loop, at most `workers` at a time per loop
+        self.async_concurrency = workers
+        self._async_slots = weakref.WeakKeyDictionary()
+        self._async_waiting = 0
+        self._counter_lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+        self.retries = 0
+        self.rejected = 0
+        self.expired = 0
+        self.max_depth_seen = 0
+        for worker in self._workers:
+            worker.start()
+
+    def _increment(self, counter):
+        with self._counter_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def submit(self, fn, priority=None, timeout=None):
+        """Queue fn() and return a Future for its result.
+
+        timeout is a deadline in seconds from now. Priority and timeout
+        default to the values set with call_options(). Raises QueueFullError
+        when the queue is at capacity.
+        """
+        default_priority, default_timeout = _call_options.get()
+        priority = default_priority if priority is None else priority
+        timeout = default_timeout if timeout is None else timeout
+        future = Future()
+        deadline = time.monotonic() + timeout if timeout else None
+        with self._condition:
+            self._check_capacity()
+            heapq.heappush(self._heap, (priority, next(self._order), fn, future, deadline))
+            self._note_depth()
+            self._condition.notify()
+        return future
+
+    def _check_capacity(self):
+        """Raise QueueFullError if no more calls may wait; call with the condition held."""
+        if len(self._heap) + self._async_waiting >= self.max_queue:
+            self._increment('rejected')
+            raise QueueFullError(f"Model call queue is full ({self.max_queue} waiting)")
+
+    def _note_depth(self):
+        self.max_depth_seen = max(self.max_depth_seen, len(self._heap) + self._async_waiting)
+
+    def call(self, fn, priority=None, timeout=None):
+        """Run fn() through the scheduler and wait for its result.
+
+        Waits no longer than the deadline: a call still queued is cancelled,
+        and one already running is left to finish without the caller.
+        """
+        timeout = _call_options.get()[1] if timeout is None else timeout
+        future = self.submit(fn, priority, timeout)
+        try:
+            return future.result(timeout=timeout or None)
+        except FutureTimeoutError:
+            raise self.abandon(future) from None
+
+    def cancel(self, future):
+        """Cancel a submitted call that has not started and drop it from the queue.
+
+        Returns False when the call is already running.
+        """
+        if not future.cancel():
+            return False
+        self._discard(future)
+        return True
+
+    def abandon(self, future):
+        """Give up on a submitted call whose deadline passed and return the error to raise.
+
+        A call still queued is cancelled; one already running is left to finish.
+        """
+        self._increment('expired')
+        if self.cancel(future):
+            return DeadlineExceededError("Deadline exceeded while waiting in queue")
+        return DeadlineExceededError("Deadline exceeded while waiting for the model")
+
+    def _discard(self, future):
+        """Remove a cancelled call from the queue so it no longer counts toward its depth."""
+        with self._condition:
+            self._heap = [entry for entry in self._heap if entry[3] is not future]
+            heapq.heapify(self._heap)
+
+    async def call_async(self, coroutine_fn, timeout=None):
+        """Await coroutine_fn() under the shared rate limit and retry policy.
+
+        Async callers are interactive requests, so they skip the priority
+        order but share the token bucket and queue capacity with the worker
+        threads, and at most MODEL_CONCURRENCY run at once on an event loop.
+        Raises QueueFullError when the queue is at capacity.
+        """
+        timeout = _call_options.get()[1] if timeout is None else timeout
+        deadline = time.monotonic() + timeout if timeout else None
+        slots = self._async_slots_for_loop()
+        if slots.locked():
+            await self._wait_for_slot(slots, deadline)
+        else:
+            await slots.acquire()
+        try:
+            return await self._call_async(coroutine_fn, deadline)
+        finally:
+            slots.release()
+
+    def _async_slots_for_loop(self):
+        loop = asyncio.get_running_loop()
+        slots = self._async_slots.get(loop)
+        if slots is None:
+            slots = self._async_slots[loop] = asyncio.Semaphore(self.async_concurrency)
+        return slots
+
+    async def _wait_for_slot(self, slots, deadline):
+        """Wait for a free async slot, counted as a queued call until one frees up."""
+        with self._condition:
+            self._check_capacity()
+            self._async_waiting += 1
+            self._note_depth()
+        try:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            await asyncio.wait_for(slots.acquire(), remaining)
+        except asyncio.TimeoutError:
+            self._increment('expired')
+            raise DeadlineExceededError("Deadline exceeded while waiting in queue") from None
+        finally:
+            with self._condition:
+                self._async_waiting -= 1
+
+    async def _call_async(self, coroutine_fn, deadline):
+        attempt = 0
+        while True:
+            while True:
+                try:
+                    self._check_deadline(deadline, "waiting for rate limit")
+                except DeadlineExceededError:
+                    self._increment('failed')
+                    raise
+                wait = self.bucket.try_acquire()
+                if not wait:
+                    break
+                await asyncio.sleep(wait)
+            try:
+                result = await coroutine_fn()
+                self._increment('completed')
+                return result
+            except Exception as e:
+                try:
+                    delay = self._retry_delay(e, attempt, deadline)
+                except Exception:
+                    self._increment('failed')
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while not self._heap:
+                    self._condition.wait()
+                _, _, fn, future, deadline = heapq.heappop(self._heap)
+
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self._run(fn, deadline))
+                self._increment('completed')
+            except BaseException as e:
+                self._increment('failed')
+                future.set_exception(e)
+
+    def _run(self, fn, deadline):
+        self._check_deadline(deadline, "waiting in queue")
+        attempt = 0
+        while True:
+            while True:
+                self._check_deadline(deadline, "waiting for rate limit")
+                wait = self.bucket.try_acquire()
+                if not wait:
+                    break
+                time.sleep(wait)
+            try:
+                return fn()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, deadline)
+                attempt += 1
+                time.sleep(delay)
+
+    def _check_deadline(self, deadline, stage):
+        if deadline is not None and time.monotonic() > deadline:
+            self._increment('expired')
+            raise DeadlineExceededError(f"Deadline exceeded while {stage}")
+
+    def _retry_delay(self, error, attempt, deadline):
+        """Return the backoff before retrying, or re-raise if the error is final."""
+        if not is_retryable(error) or attempt >= self.max_retries:
+            raise error
+        if is_quota_error(error):
+            self.bucket.penalize()
+        # Full jitter: a random delay up to the exponential cap
+        delay = random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** attempt))
+        if deadline is not None and time.monotonic() + delay > deadline:
+            self._increment('expired')
+            raise DeadlineExceededError("Deadline exceeded while retrying model call") from error
+        self._increment('retries')
+        return delay
+
+    def stats(self):
+        """Return queue depth and call counters."""
+        with self._condition:
+            depth = len(self._heap) + self._async_waiting
+            by_priority = {}
+            for priority, *_ in self._heap:
+                label = {INTERACTIVE: "interactive", BATCH: "batch"}.get(priority, str(priority))
+                by_priority[label] = by_priority.get(label, 0) + 1
+            if self._async_waiting:
+                by_priority["interactive"] = by_priority.get("interactive", 0) + self._async_waiting
+        return {
+            "queue_depth": depth,
+            "queue_depth_by_priority": by_priority,
+            "max_queue_depth_seen": self.max_depth_seen,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "failed": self.failed,
+            "retries": self.retries,
+            "rejected": self.rejected,
+            "deadline_expired": self.expired
+        }
+
+
+# Shared scheduler sized from the environment (defaults suit a 60 requests/minute quota;
+# MODEL_RATE_LIMIT=0 turns pacing off, e.g. for the fake model)
+scheduler = ModelCallScheduler(
+    rate_per_second=float(os.getenv("MODEL_RATE_LIMIT", "1.0")),
+    burst=float(os.getenv("MODEL_RATE_BURST", "5")),
+    max_queue=int(os.getenv("MODEL_QUEUE_SIZE", "1000")),
+    workers=int(os.getenv("MODEL_CONCURRENCY", "16")),
+    max_retries=int(os.getenv("MODEL_MAX_RETRIES", "4"))
+)
@@ -0,0 +1,262 @@
+"""
+Near-duplicate cache for AI Sales Coach analyses.
+The exact response cache only helps when a prompt repeats byte for byte.
+Scripted openers and lightly edited calls miss it. This cache embeds each
+conversation as a hashed word n-gram vector and finds near neighbours with a
+random-hyperplane LSH index. It returns stored feedback when cosine
+similarity clears a threshold for the same analysis type, methodology and
+model. It is opt-in (SEMANTIC_CACHE=1) because a near match can differ from
+a fresh analysis.
+"""
+
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from prompt_builder import normalize_methodology
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def embed(text, dimensions=2048):
+    """Return an L2-normalized sparse vector {index: weight} of word unigrams and bigrams."""
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    counts = {}
+    for i, token in enumerate(tokens):
+        features = (token, tokens[i - 1] + " " + token) if i else (token,)
+        for feature in features:
+            index = zlib.crc32(feature.encode("utf-8")) % dimensions
+            counts[index] = counts.get(index, 0) + 1
+    # Sublinear term frequency so repeated filler does not dominate
+    vector = {index: 1 + math.log(count) for index, count in counts.items()}
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    return {index: weight / norm for index, weight in vector.items()} if norm else {}
+
+
+def cosine(a, b):
+    """Cosine similarity of two normalized sparse vectors."""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(index, 0.0) for index, weight in a.items())
+
+
+class SemanticCache:
+    """Bounded LRU of analyses, searchable by conversation similarity."""
+
+    def __init__(self, threshold=0.92, max_entries=2048, db_path=None,
+                 dimensions=2048, tables=8, bits=10, seed=7):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.dimensions = dimensions
+        self.tables = tables
+        self.bits = bits
+        self.seed = seed
+        # The hyperplanes and the database are set up on first use, so a
+        # disabled cache costs nothing at import
+        self._planes = None
+        self._planes_lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._db = None
+        self._opened = False
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.lookup_seconds = 0.0
+        self.hit_similarity = 0.0
+
+    def _hyperplanes(self):
+        """Return the random ±1 hyperplanes, seeded so signatures stay stable across restarts."""
+        with self._planes_lock:
+            if self._planes is None:
+                rng = random.Random(self.seed)
+                planes = self.tables * self.bits
+                self._planes = []
+                for _ in range(self.dimensions):
+                    mask = rng.getrandbits(planes)
+                    self._planes.append([1.0 if mask >> plane & 1 else -1.0 for plane in range(planes)])
+            return self._planes
+
+    def _open(self):
+        """Open the database and load its entries on first use; call with the lock held."""
+        if self._opened:
+            return
+        self._opened = True
+        if self.db_path:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS semantic_entries "
+                "(key TEXT PRIMARY KEY, scope TEXT NOT NULL, vector TEXT NOT NULL, "
+                "feedback TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+            self._load()
+
+    @staticmethod
+    def make_scope(analysis_type, methodology, model_name):
+        """Return the scope an entry is shared within."""
+        return f"{model_name}|{analysis_type}|{normalize_methodology(methodology) or 'none'}"
+
+    def _signatures(self, vector):
+        planes = self._hyperplanes()
+        sums = [0.0] * (self.tables * self.bits)
+        for index, weight in vector.items():
+            for plane, sign in enumerate(planes[index]):
+                sums[plane] += weight * sign
+        signatures = []
+        for table in range(self.tables):
+            signature = 0
+            for bit in range(self.bits):
+                if sums[table * self.bits + bit] > 0:
+                    signature |= 1 << bit
+            signatures.append((table, signature))
+        return signatures
+
+    def get(self, conversation, scope):
+        """Return (feedback, similarity) for the nearest cached conversation, or None."""
+        start = time.perf_counter()
+        vector = embed(conversation, self.dimensions)
+        signatures = self._signatures(vector)
+        with self._lock:
+            self._open()
+            candidates = set()
+            for table, signature in signatures:
+                candidates.update(self._buckets.get((scope, table, signature), ()))
+
+            best_key, best_similarity = None, self.threshold
+            for key in candidates:
+                similarity = cosine(vector, self._entries[key][1])
+                if similarity >= best_similarity:
+                    best_key, best_similarity = key, similarity
+
+            self.lookup_seconds += time.perf_counter() - start
+            if best_key is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            self.hit_similarity += best_similarity
+            return self._entries[best_key][2], best_similarity
+
+    def set(self, conversation, scope, feedback):
+        """Store feedback for a conversation, evicting the least recently used entry when full."""
+        vector = embed(conversation, self.dimensions)
+        created = time.time()
+        key = hashlib.sha256(f"{scope}\0{conversation}".encode("utf-8")).hexdigest()
+        with self._lock:
+            self._open()
+            self._insert(key, scope, vector, feedback)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO semantic_entries (key, scope, vector, feedback, created) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, scope, json.dumps(vector), feedback, created)
+                )
+                self._db.commit()
+
+    def record_bypass(self):
+        """Count a lookup skipped because the caller asked for a fresh analysis."""
+        with self._lock:
+            self.bypasses += 1
+
+    def _insert(self, key, scope, vector, feedback):
+        if key in self._entries:
+            self._remove(key)
+        signatures = self._signatures(vector)
+        self._entries[key] = (scope, vector, feedback, signatures)
+        for table, signature in signatures:
+            self._buckets.setdefault((scope, table, signature), set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            if self._db is not None:
+                self._db.execute("DELETE FROM semantic_entries WHERE key = ?", (oldest,))
+
+    def _remove(self, key):
+        scope, _, _, signatures = self._entries.pop(key)
+        for table, signature in signatures:
+            bucket = self._buckets[(scope, table, signature)]
+            bucket.discard(key)
+            if not bucket:
+                del self._buckets[(scope, table, signature)]
+
+    def _load(self):
+        rows = self._db.execute(
+            "SELECT key, scope, vector, feedback FROM semantic_entries ORDER BY created DESC LIMIT ?",
+            (self.max_entries,)
+        ).fetchall()
+        for key, scope, vector, feedback in reversed(rows):
+            vector = {int(index): weight for index, weight in json.loads(vector).items()}
+            self._insert(key, scope, vector, feedback)
+
+    def clear(self):
+        """Drop every cached entry (memory and disk) and reset counters."""
+        with self._lock:
+            self._open()
+            self._entries.clear()
+            self._buckets.clear()
+            self.hits = self.misses = self.bypasses = 0
+            self.lookup_seconds = self.hit_similarity = 0.0
+            if self._db is not None:
+                self._db.execute("DELETE FROM semantic_entries")
+                self._db.commit()
+
+    def stats(self):
+        """Return hit/miss counters, lookup latency and similarity of hits."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypasses": self.bypasses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "avg_lookup_ms": round(self.lookup_seconds / lookups * 1000, 3) if lookups else 0.0,
+                "avg_hit_similarity": round(self.hit_similarity / self.hits, 3) if self.hits else 0.0,
+                "threshold": self.threshold,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "persistent": bool(self.db_path)
+            }
+
+
+def semantic_cache_enabled():
+    """Return True when near-duplicate lookups should run before analyses."""
+    return os.getenv("SEMANTIC_CACHE", "0") == "1"
+
+
+def lookup_feedback(conversation, analysis_type, methodology, model_name, use_cache=True):
+    """Return feedback cached for a near-identical conversation, or None.
+
+    Always None while the semantic cache is disabled.
+    """
+    if not semantic_cache_enabled():
+        return None
+    if not use_cache:
+        semantic_cache.record_bypass()
+        return None
+    match = semantic_cache.get(conversation, SemanticCache.make_scope(analysis_type, methodology, model_name))
+    return match[0] if match else None
+
+
+def store_feedback(conversation, analysis_type, methodology, model_name, feedback):
+    """Remember feedback for later near-duplicate lookups when the cache is enabled."""
+    if semantic_cache_enabled():
+        semantic_cache.set(conversation, SemanticCache.make_scope(analysis_type, methodology, model_name), feedback)
+
+
+# Shared cache configured from the environment
+semantic_cache = SemanticCache(
+    threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")),
+    max_entries=int(os.getenv("SEMANTIC_CACHE_SIZE", "2048")),
+    db_path=os.getenv("SEMANTIC_CACHE_DB") or None
+)
@@ -0,0 +1,48 @@
+"""
+Production launcher for the async AI Sales Coach API (asgi_app.py).
+
+Usage:
+    python serve.py --workers 4 --port 8000 --request-timeout 120 --graceful-timeout 30
+
+On SIGINT/SIGTERM the server stops accepting connections and waits up to
+--graceful-timeout seconds for in-flight analyses to finish.
+"""
+
+import argparse
+import os
+
+import uvicorn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the async AI Sales Coach API")
+    parser.add_argument('--host', default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument('--port', type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument('--workers', type=int, default=int(os.getenv("WEB_CONCURRENCY", "1")),
+                        help="Number of worker processes")
+    parser.add_argument('--request-timeout', type=float, default=float(os.getenv("REQUEST_TIMEOUT", "120")),
+                        help="Seconds before an analysis request returns 504")
+    parser.add_argument('--graceful-timeout', type=int, default=30,
+                        help="Seconds to wait for in-flight requests on shutdown")
+    parser.add_argument('--keep-alive', type=int, default=5,
+                        help="Seconds to keep idle HTTP connections open")
+    args = parser.parse_args()
+
+    # Workers are separate processes, so the timeout is passed through the environment
+    os.environ["REQUEST_TIMEOUT"] = str(args.request_timeout)
+
+    print("Starting AI Sales Coach async API server...")
+    print(f"API will be available at: http://localhost:{args.port}")
+    uvicorn.run(
+        "asgi_app:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_keep_alive=args.keep_alive,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        log_level="info"
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""
+Single-flight coalescing of identical in-flight model calls.
+When several requests for the same key arrive while one call for that key is
+still running, they wait for and share its result instead of starting their
+own upstream call. Streamed calls are shared the same way: followers replay
+the leader's chunks as they arrive.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+class _SharedStream:
+    """Chunks of one in-flight stream, readable by any number of followers."""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.condition = threading.Condition()
+
+    def publish(self, chunk):
+        with self.condition:
+            self.chunks.append(chunk)
+            self.condition.notify_all()
+
+    def finish(self, error=None):
+        with self.condition:
+            self.done = True
+            self.error = error
+            self.condition.notify_all()
+
+    def replay(self):
+        """Yield every chunk, waiting for new ones until the stream finishes."""
+        position = 0
+        while True:
+            with self.condition:
+                while position >= len(self.chunks) and not self.done:
+                    self.condition.wait()
+                chunks = self.chunks[position:]
+                position = len(self.chunks)
+                done, error = self.done, self.error
+            yield from chunks
+            if done:
+                if error is not None:
+                    raise error
+                return
+
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers with the same key."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._streams = {}
+        # Running async calls, referenced so they are not garbage collected
+        self._tasks = set()
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """Run fn() once per key at a time; concurrent callers get the same result.
+
+        If fn raises, every waiting caller receives the same exception.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                future = Future()
+                self._calls[key] = future
+                self.calls += 1
+                leader = True
+
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return future.result()
+
+    async def do_async(self, key, coroutine_fn):
+        """Async variant of do() for coroutine-based model calls."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                future = Future()
+                self._calls[key] = future
+                self.calls += 1
+                leader = True
+
+        if leader:
+            # The call runs as its own task, so a caller that is cancelled (a
+            # request timeout or client disconnect) does not cancel it for the others
+            task = asyncio.ensure_future(self._lead_async(key, future, coroutine_fn))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    async def _lead_async(self, key, future, coroutine_fn):
+        try:
+            future.set_result(await coroutine_fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def do_stream(self, key, stream_fn):
+        """Yield the chunks of stream_fn() once per key at a time; concurrent callers replay them.
+
+        If the leader's consumer stops reading early, the stream is still read
+        to the end so followers get the full response.
+        """
+        with self._lock:
+            shared = self._streams.get(key)
+            if shared is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                shared = _SharedStream()
+                self._streams[key] = shared
+                self.calls += 1
+                leader = True
+
+        if not leader:
+            yield from shared.replay()
+            return
+
+        error = None
+        try:
+            iterator = iter(stream_fn())
+            for chunk in iterator:
+                shared.publish(chunk)
+                yield chunk
+        except GeneratorExit:
+            try:
+                for chunk in iterator:
+                    shared.publish(chunk)
+            except Exception as e:
+                error = e
+            raise
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            with self._lock:
+                del self._streams[key]
+            shared.finish(error)
+
+    def stats(self):
+        """Return upstream call and coalesced request counters."""
+        with self._lock:
+            return {
+                "upstream_calls": self.calls,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls) + len(self._streams)
+            }
+
+
+# Shared instance used by both the Flask backend and the Streamlit app
+single_flight = SingleFlight()
@@ -0,0 +1,57 @@
+import threading
+
+from analysis_pipeline import AnalysisPipeline
+from scheduler import BATCH, call_options, current_call_options
+
+LONG_CONVERSATION = "\n".join(
+    f"Salesperson: Question {i} about your current process?\nCustomer: Answer {i} " + "detail " * 40
+    for i in range(400)
+)
+
+
+def test_window_calls_run_with_the_callers_call_options():
+    seen = []
+    lock = threading.Lock()
+
+    def generate(prompt, analysis_type):
+        with lock:
+            seen.append((threading.current_thread().name, current_call_options()))
+        return "## Window feedback\n- Fine."
+
+    pipeline = AnalysisPipeline("test-model", generate)
+    with call_options(BATCH, 30):
+        pipeline.build_prompt(LONG_CONVERSATION, "general", None, use_cache=False)
+
+    assert len(seen) > 1
+    assert any(name != threading.current_thread().name for name, _ in seen)
+    assert all(options == (BATCH, 30) for _, options in seen)
+
+
+def test_short_conversation_is_answered_by_one_model_call():
+    calls = []
+
+    def generate(prompt, analysis_type):
+        calls.append(analysis_type)
+        return "## Feedback\n- Ask more questions."
+
+    pipeline = AnalysisPipeline("test-model", generate)
+    feedback = pipeline.feedback("Salesperson: Hi.\nCustomer: Hello.", "closing", None, use_cache=False)
+    assert feedback == "## Feedback\n- Ask more questions."
+    assert calls == ["closing"]
+
+
+def test_stream_timings_are_recorded_when_the_client_stops_reading(monkeypatch):
+    finished = []
+    monkeypatch.setattr("metrics.RequestTimer.finish", lambda timer: finished.append(dict(timer.stages)))
+
+    def stream(prompt, analysis_type):
+        yield "## Feedback\n"
+        yield "- Ask more questions."
+
+    pipeline = AnalysisPipeline("test-model", None, stream=stream)
+    chunks = pipeline.feedback_stream("Salesperson: Hi.\nCustomer: Hello.", "closing", None, use_cache=False)
+    assert next(chunks) == "## Feedback\n"
+    chunks.close()
+
+    assert len(finished) == 1
+    assert {"prompt_build", "model", "first_chunk", "stream_total"} <= set(finished[0])
@@ -0,0 +1,37 @@
+from compaction import compact
+
+
+def test_unlabeled_transcript_keeps_its_lines():
+    conversation = "Rep:   Hi,  thanks for joining.\n\n\nProspect: Happy to.\nRep: What are you using today?\nProspect: Spreadsheets."
+    compacted, dropped = compact(conversation)
+    assert compacted.splitlines() == [
+        "Rep: Hi, thanks for joining.",
+        "Prospect: Happy to.",
+        "Rep: What are you using today?",
+        "Prospect: Spreadsheets."
+    ]
+    assert dropped == 0
+
+
+def test_multi_line_turn_keeps_its_line_breaks():
+    conversation = (
+        "Salesperson: Here is the plan:\n  1.  A pilot  for your team\n\n  2. A review in May\n"
+        "Customer: Mm-hmm.\n"
+        "Salesperson: Does that work for you?\n"
+        "Customer: Mm-hmm."
+    )
+    compacted, dropped = compact(conversation)
+    assert compacted.splitlines() == [
+        "Salesperson: Here is the plan:",
+        "1. A pilot for your team",
+        "2. A review in May",
+        "Salesperson: Does that work for you?",
+        "Customer: Mm-hmm."
+    ]
+    # Only the backchannel that does not answer a question is dropped
+    assert dropped == 1
+
+
+def test_short_acceptance_of_a_proposal_is_kept():
+    conversation = "Salesperson: Shall we book a demo for Tuesday?\nCustomer: Sure, sounds good."
+    assert compact(conversation) == (conversation, 0)
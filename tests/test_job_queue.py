@@ -0,0 +1,93 @@
+import threading
+import time
+
+from job_queue import DONE, FAILED, QUEUED, RUNNING, JobQueue, host_allowed, valid_callback_url
+
+
+def wait_for_status(queue, job_id, status, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] == status:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} is {queue.get(job_id)['status']}, expected {status}")
+
+
+def test_queued_jobs_run_after_restart(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    # Queued by a process that stopped before running it
+    first = JobQueue(db_path, handler=lambda request: None)
+    job_id = first.submit({"n": 1})
+    assert first.get(job_id)["status"] == QUEUED
+
+    restarted = JobQueue(db_path, handler=lambda request: {"double": request["n"] * 2}, poll_interval=0.05)
+    restarted.start()
+    job = wait_for_status(restarted, job_id, DONE)
+    assert job["result"] == {"double": 2}
+
+
+def test_long_job_is_not_requeued_while_its_process_is_alive(tmp_path):
+    release = threading.Event()
+    runs = []
+
+    def handler(request):
+        runs.append(1)
+        release.wait(5)
+        return "ok"
+
+    queue = JobQueue(str(tmp_path / "jobs.db"), handler=handler, workers=2, poll_interval=0.05, stale_after=0.2)
+    queue.start()
+    job_id = queue.submit({})
+    wait_for_status(queue, job_id, RUNNING)
+    # Several stale_after periods pass while the idle worker does housekeeping
+    time.sleep(0.8)
+    assert queue.get(job_id)["status"] == RUNNING
+    release.set()
+    wait_for_status(queue, job_id, DONE)
+    assert len(runs) == 1
+
+
+def test_job_of_a_dead_process_is_requeued(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    dead = JobQueue(db_path, handler=lambda request: None)
+    job_id = dead.submit({})
+    # Claimed by a process that then died without heartbeating
+    dead._claim()
+    dead._connection().execute("UPDATE jobs SET heartbeat = ?", (time.time() - 60,))
+    dead._connection().commit()
+
+    alive = JobQueue(db_path, handler=lambda request: "ok", poll_interval=0.05, stale_after=1)
+    alive.start()
+    assert wait_for_status(alive, job_id, DONE)["result"] == "ok"
+
+
+def test_queue_opens_nothing_until_used(tmp_path):
+    db_path = tmp_path / "jobs.db"
+    JobQueue(str(db_path), handler=lambda request: None)
+    assert not db_path.exists()
+
+
+def test_unstorable_result_fails_the_job_and_keeps_the_worker(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), handler=lambda request: request.get("result", object()),
+                     workers=1, poll_interval=0.05)
+    queue.start()
+    bad = queue.submit({})
+    job = wait_for_status(queue, bad, FAILED)
+    assert job["error"].startswith("Could not store the job result")
+    good = queue.submit({"result": "ok"})
+    assert wait_for_status(queue, good, DONE)["result"] == "ok"
+
+
+def test_callback_urls_must_point_at_public_or_allowed_hosts():
+    assert not valid_callback_url("ftp://example.com/hook")
+    assert not valid_callback_url("http://localhost:5000/hook")
+    assert not valid_callback_url("http://127.0.0.1/hook")
+    assert not valid_callback_url("http://10.0.0.5/hook")
+    assert not valid_callback_url("http://169.254.169.254/latest/meta-data")
+    assert not valid_callback_url("http://[::1]/hook")
+    assert valid_callback_url("https://8.8.8.8/hook")
+    assert valid_callback_url("http://localhost:9000/hook", allowed_hosts=("localhost",))
+    assert not valid_callback_url("https://8.8.8.8/hook", allowed_hosts=("hooks.example.com",))
+    assert host_allowed("a.hooks.example.com", (".example.com",))
+    assert not host_allowed("example.com.evil.net", (".example.com",))
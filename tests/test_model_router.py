@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+import model_router
+from model_router import ModelRouter
+from scheduler import DeadlineExceededError, ModelCallScheduler
+
+ANSWER = "## Assessment\n- " + "A structured answer. " * 20
+
+
+class StubRouter(ModelRouter):
+    """Router whose models answer after fixed latencies instead of calling the API."""
+
+    def __init__(self, latencies, hedge_after):
+        super().__init__({"general": {"hedge_after": hedge_after}}, fast_config="fast")
+        self.latencies = latencies
+
+    def _call(self, config, prompt):
+        time.sleep(self.latencies[config])
+        return ANSWER
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    scheduler = ModelCallScheduler(rate_per_second=0, burst=1, max_queue=100, workers=1)
+    monkeypatch.setattr(model_router, "scheduler", scheduler)
+    return scheduler
+
+
+def test_routed_call_fails_at_its_deadline_when_both_models_hang(scheduler):
+    router = StubRouter({"fast": 2, "large": 2}, hedge_after=0.1)
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceededError):
+        router.generate("Salesperson: hi", "general", "large", timeout=0.3)
+    assert time.monotonic() - start < 1
+    # The backup never started on the single busy worker and was dropped from the queue
+    assert scheduler.stats()["queue_depth"] == 0
+
+
+def test_hedged_call_returns_the_faster_answer(monkeypatch):
+    scheduler = ModelCallScheduler(rate_per_second=0, burst=1, max_queue=100, workers=2)
+    monkeypatch.setattr(model_router, "scheduler", scheduler)
+    router = StubRouter({"fast": 1, "large": 0.05}, hedge_after=0.1)
+    start = time.monotonic()
+    assert router.generate("Salesperson: hi", "general", "large", timeout=5) == ANSWER
+    assert time.monotonic() - start < 0.8
+    assert router.stats()["hedge_wins"] == 1
+
+
+class FakeChunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeStreamingModel:
+    def generate_content(self, prompt, stream=False):
+        return iter([FakeChunk("## Assessment\n"), FakeChunk("- Good call.\n")])
+
+
+def test_streamed_call_is_accounted_to_its_model(scheduler, monkeypatch):
+    monkeypatch.setattr(model_router.model_registry, "get", lambda config: FakeStreamingModel())
+    monkeypatch.setattr(model_router.model_registry, "model_name", lambda config: f"{config}-model")
+    router = ModelRouter({}, fast_config="fast")
+    assert "".join(router.stream("Salesperson: hi", "general", "large")) == "## Assessment\n- Good call.\n"
+    stats = router.stats()
+    assert stats["routed"] == {"fast": 1, "large": 0}
+    assert stats["models"]["fast-model"]["calls"] == 1
+    assert stats["models"]["fast-model"]["output_tokens"] > 0
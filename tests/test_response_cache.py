@@ -0,0 +1,29 @@
+import sqlite3
+
+from response_cache import ResponseCache
+
+
+def db_keys(db_path):
+    with sqlite3.connect(db_path) as db:
+        return {key for (key,) in db.execute("SELECT key FROM responses")}
+
+
+def test_sqlite_tier_keeps_newest_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr("response_cache.TRIM_EVERY", 1)
+    db_path = str(tmp_path / "cache.db")
+    cache = ResponseCache(max_entries=2, ttl_seconds=None, db_path=db_path, max_db_rows=3)
+    for i in range(5):
+        cache.set(f"key{i}", f"value{i}")
+    assert db_keys(db_path) == {"key2", "key3", "key4"}
+
+
+def test_sqlite_tier_sweeps_expired_rows_on_write(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "cache.db")
+    cache = ResponseCache(ttl_seconds=60, db_path=db_path)
+    now = [1000.0]
+    monkeypatch.setattr("response_cache.time.time", lambda: now[0])
+    cache.set("old", "value")
+    now[0] += 120
+    # The expired row is never read again, but the next write removes it
+    cache.set("new", "value")
+    assert db_keys(db_path) == {"new"}
@@ -0,0 +1,122 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from scheduler import BATCH, INTERACTIVE, DeadlineExceededError, ModelCallScheduler, QueueFullError, call_options
+
+
+class QuotaError(Exception):
+    code = 429
+
+
+def make_scheduler(workers=1, **kwargs):
+    return ModelCallScheduler(rate_per_second=0, burst=1, max_queue=100, workers=workers,
+                              base_backoff=0.01, max_backoff=0.05, **kwargs)
+
+
+def test_deadline_expires_while_waiting_behind_a_busy_worker():
+    scheduler = make_scheduler()
+    release = threading.Event()
+    scheduler.submit(lambda: release.wait(5))
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceededError, match="waiting in queue"):
+        scheduler.call(lambda: "late", timeout=0.2)
+    assert time.monotonic() - start < 1
+    assert scheduler.stats()["queue_depth"] == 0
+    assert scheduler.stats()["deadline_expired"] == 1
+    release.set()
+
+
+def test_deadline_from_call_options():
+    scheduler = make_scheduler()
+    release = threading.Event()
+    scheduler.submit(lambda: release.wait(5))
+    with call_options(INTERACTIVE, 0.1):
+        with pytest.raises(DeadlineExceededError):
+            scheduler.call(lambda: "late")
+    release.set()
+
+
+def test_interactive_calls_run_before_batch_calls():
+    scheduler = make_scheduler()
+    release = threading.Event()
+    order = []
+    scheduler.submit(lambda: release.wait(5))
+    batch = scheduler.submit(lambda: order.append("batch"), priority=BATCH)
+    interactive = scheduler.submit(lambda: order.append("interactive"), priority=INTERACTIVE)
+    release.set()
+    batch.result(5)
+    interactive.result(5)
+    assert order == ["interactive", "batch"]
+
+
+def test_quota_errors_are_retried():
+    scheduler = make_scheduler()
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise QuotaError("429 quota")
+        return "ok"
+
+    assert scheduler.call(flaky, timeout=5) == "ok"
+    assert len(attempts) == 3
+    assert scheduler.stats()["retries"] == 2
+
+
+def test_other_errors_are_not_retried():
+    scheduler = make_scheduler()
+    attempts = []
+
+    def broken():
+        attempts.append(1)
+        raise ValueError("bad prompt")
+
+    with pytest.raises(ValueError):
+        scheduler.call(broken)
+    assert len(attempts) == 1
+
+
+def test_async_calls_share_the_concurrency_cap_and_queue_limit():
+    scheduler = ModelCallScheduler(rate_per_second=0, burst=1, max_queue=1, workers=2)
+    running = []
+    peak = []
+
+    async def model_call():
+        running.append(1)
+        peak.append(len(running))
+        await asyncio.sleep(0.05)
+        running.pop()
+        return "ok"
+
+    async def main():
+        calls = [asyncio.ensure_future(scheduler.call_async(model_call)) for _ in range(4)]
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert max(peak) == 2
+    # Two calls run, one waits for a slot and the fourth finds the queue full
+    assert results.count("ok") == 3
+    assert sum(isinstance(result, QueueFullError) for result in results) == 1
+    assert scheduler.stats()["rejected"] == 1
+
+
+def test_async_call_waiting_for_a_slot_fails_at_its_deadline():
+    scheduler = ModelCallScheduler(rate_per_second=0, burst=1, max_queue=10, workers=1)
+
+    async def slow_call():
+        await asyncio.sleep(1)
+
+    async def main():
+        busy = asyncio.ensure_future(scheduler.call_async(slow_call))
+        await asyncio.sleep(0)
+        with pytest.raises(DeadlineExceededError, match="waiting in queue"):
+            await scheduler.call_async(slow_call, timeout=0.1)
+        assert scheduler.stats()["queue_depth"] == 0
+        busy.cancel()
+
+    asyncio.run(main())
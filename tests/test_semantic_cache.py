@@ -0,0 +1,22 @@
+from semantic_cache import SemanticCache
+
+CONVERSATION = "Salesperson: Hi, thanks for taking the call. What does your team use today?\nCustomer: Spreadsheets, mostly."
+
+
+def test_cache_builds_nothing_until_used(tmp_path):
+    db_path = tmp_path / "semantic.db"
+    cache = SemanticCache(db_path=str(db_path))
+    assert cache._planes is None
+    assert not db_path.exists()
+
+    assert cache.get(CONVERSATION, "scope") is None
+    assert cache._planes is not None
+    assert db_path.exists()
+
+
+def test_persisted_entries_are_found_after_a_restart(tmp_path):
+    db_path = str(tmp_path / "semantic.db")
+    SemanticCache(db_path=db_path).set(CONVERSATION, "scope", "## Feedback")
+    feedback, similarity = SemanticCache(db_path=db_path).get(CONVERSATION + " Thanks.", "scope")
+    assert feedback == "## Feedback"
+    assert similarity > 0.92
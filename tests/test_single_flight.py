@@ -0,0 +1,129 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def run_concurrently(count, fn):
+    results = [None] * count
+    barrier = threading.Barrier(count)
+
+    def worker(i):
+        barrier.wait()
+        results[i] = fn()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return "feedback"
+
+    results = run_concurrently(5, lambda: flight.do("key", slow))
+    assert results == ["feedback"] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {"upstream_calls": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_error_reaches_every_caller():
+    flight = SingleFlight()
+
+    def failing():
+        time.sleep(0.2)
+        raise RuntimeError("model down")
+
+    def call():
+        try:
+            flight.do("key", failing)
+        except RuntimeError as e:
+            return str(e)
+
+    assert run_concurrently(3, call) == ["model down"] * 3
+
+
+def test_concurrent_streams_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    def stream():
+        calls.append(1)
+        for chunk in ("a", "b", "c"):
+            time.sleep(0.05)
+            yield chunk
+
+    results = run_concurrently(5, lambda: "".join(flight.do_stream("key", stream)))
+    assert results == ["abc"] * 5
+    assert len(calls) == 1
+    assert flight.stats()["coalesced"] == 4
+
+
+def test_stream_followers_finish_when_leader_stops_reading():
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def stream():
+        started.set()
+        for chunk in ("a", "b", "c"):
+            time.sleep(0.05)
+            yield chunk
+
+    leader = flight.do_stream("key", stream)
+    assert next(leader) == "a"
+    follower = []
+    thread = threading.Thread(target=lambda: follower.append("".join(flight.do_stream("key", stream))))
+    thread.start()
+    time.sleep(0.02)
+    leader.close()
+    thread.join(5)
+    assert follower == ["abc"]
+
+
+def test_stream_error_reaches_followers():
+    flight = SingleFlight()
+
+    def stream():
+        yield "a"
+        time.sleep(0.1)
+        raise RuntimeError("stream broke")
+
+    def read():
+        with pytest.raises(RuntimeError):
+            "".join(flight.do_stream("key", stream))
+        return True
+
+    assert run_concurrently(3, read) == [True] * 3
+
+
+def test_cancelled_async_leader_does_not_cancel_followers():
+    flight = SingleFlight()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.2)
+        return "shared"
+
+    async def scenario():
+        # The leader's request times out before the call finishes; a follower that joined later still gets the result
+        leader = asyncio.ensure_future(asyncio.wait_for(flight.do_async("key", call), timeout=0.05))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(flight.do_async("key", call))
+        with pytest.raises(asyncio.TimeoutError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == "shared"
+    assert len(calls) == 1
@@ -0,0 +1,80 @@
+"""
+Map-reduce analysis for long sales call transcripts.
+A transcript is split on Salesperson:/Customer: turn boundaries into
+token-budgeted windows that overlap by a few turns. Each window is analyzed in
+parallel and the partial feedback is merged by a final reduce prompt.
+"""
+
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from prompt_builder import CHARS_PER_TOKEN, build_reduce_prompt, build_window_prompt, estimate_tokens
+from transcript_parser import parse_cached
+
+# Chunking settings (tokens are estimated locally)
+CHUNK_WINDOW_TOKENS = int(os.getenv("CHUNK_WINDOW_TOKENS", "6000"))
+CHUNK_OVERLAP_TURNS = int(os.getenv("CHUNK_OVERLAP_TURNS", "2"))
+CHUNK_MAX_WORKERS = int(os.getenv("CHUNK_MAX_WORKERS", "4"))
+
+def _turn_tokens(transcript, i):
+    return math.ceil(transcript.raw_length(i) / CHARS_PER_TOKEN)
+
+
+def make_windows(transcript, window_tokens=None, overlap_turns=None):
+    """Group the turns of a parsed transcript into windows of at most window_tokens estimated tokens.
+
+    Each window after the first repeats the last overlap_turns turns of the
+    previous one so context is not lost at the boundary. A single turn longer
+    than the budget becomes a window of its own. Windows are tracked as turn
+    ranges and each is sliced from the original text once.
+    """
+    window_tokens = window_tokens or CHUNK_WINDOW_TOKENS
+    overlap_turns = CHUNK_OVERLAP_TURNS if overlap_turns is None else overlap_turns
+
+    windows = []
+    first = 0
+    current_tokens = 0
+    new_turns = 0
+    for i in range(len(transcript)):
+        turn_tokens = _turn_tokens(transcript, i)
+        if new_turns and current_tokens + turn_tokens > window_tokens:
+            windows.append(transcript.text_range(first, i))
+            first = max(first, i - overlap_turns) if overlap_turns else i
+            current_tokens = sum(_turn_tokens(transcript, j) for j in range(first, i))
+            new_turns = 0
+            # Drop overlap that would leave no room for the next turn
+            while first < i and current_tokens + turn_tokens > window_tokens:
+                current_tokens -= _turn_tokens(transcript, first)
+                first += 1
+        current_tokens += turn_tokens
+        new_turns += 1
+
+    if new_turns:
+        windows.append(transcript.text_range(first, len(transcript)))
+    return windows
+
+
+def is_long_transcript(conversation, window_tokens=None):
+    """Return True when a conversation needs to be analyzed in windows."""
+    return estimate_tokens(conversation) > (window_tokens or CHUNK_WINDOW_TOKENS)
+
+
+def map_reduce_prompt(conversation, analysis_type, methodology, generate,
+                      window_tokens=None, overlap_turns=None, max_workers=None):
+    """Analyze each window of a long conversation in parallel.
+
+    generate(prompt) is called once per window. Returns the reduce prompt that
+    merges the partial feedback, for the caller to send to the model (or
+    stream) like any other prompt.
+    """
+    windows = make_windows(parse_cached(conversation), window_tokens, overlap_turns)
+    prompts = [
+        build_window_prompt(window, i, len(windows), analysis_type, methodology)
+        for i, window in enumerate(windows, start=1)
+    ]
+
+    with ThreadPoolExecutor(max_workers=max_workers or CHUNK_MAX_WORKERS) as executor:
+        partial_feedback = list(executor.map(generate, prompts))
+
+    return build_reduce_prompt(partial_feedback, analysis_type, methodology)
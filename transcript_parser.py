@@ -0,0 +1,154 @@
+"""
+Single-pass parser for Salesperson:/Customer: transcripts.
+A parsed Transcript keeps the original string plus compact arrays of speaker
+ids, offsets and timestamps, one entry per turn. Turn text is sliced out of
+the original string only when asked for. Labels may carry a timestamp, as in
+"[00:01:23] Salesperson:", "00:01:23 - Customer:" or "Customer (01:23):".
+The chunker and fast analysis share one cached parse of each conversation.
+"""
+
+import re
+from array import array
+from functools import lru_cache
+
+# Speaker ids; text before the first label is an UNKNOWN turn
+UNKNOWN = 0
+SALESPERSON = 1
+CUSTOMER = 2
+SPEAKERS = ("unknown", "salesperson", "customer")
+
+TIMESTAMP = r"\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d+)?"
+LABEL_PATTERN = re.compile(
+    rf"^[ \t]*(?:[\[(]?(?P<before>{TIMESTAMP})[\])]?[ \t]*-?[ \t]*)?"
+    r"(?P<speaker>salesperson|customer)"
+    rf"(?:[ \t]*[\[(](?P<after>{TIMESTAMP})[\])])?[ \t]*:",
+    re.IGNORECASE | re.MULTILINE
+)
+
+NO_TIMESTAMP = -1.0
+
+
+def _seconds(timestamp):
+    """Convert "hh:mm:ss", "mm:ss" (optionally with a fraction) to seconds."""
+    seconds = 0.0
+    for part in timestamp.replace(",", ".").split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+class Transcript:
+    """Turn-indexed view of a transcript string.
+
+    For turn i, the label starts at label_starts[i], the spoken text runs
+    from content_starts[i] to ends[i], speakers[i] is a speaker id and
+    timestamps[i] is in seconds (NO_TIMESTAMP when the label has none).
+    """
+
+    __slots__ = ("text", "speakers", "label_starts", "content_starts", "ends", "timestamps")
+
+    def __init__(self, text, speakers, label_starts, content_starts, ends, timestamps):
+        self.text = text
+        self.speakers = speakers
+        self.label_starts = label_starts
+        self.content_starts = content_starts
+        self.ends = ends
+        self.timestamps = timestamps
+
+    def __len__(self):
+        return len(self.speakers)
+
+    def __getitem__(self, turns):
+        """Return the turns in a slice as a Transcript over the same string."""
+        if not isinstance(turns, slice) or turns.step not in (None, 1):
+            raise TypeError("Transcripts can only be sliced by a contiguous turn range")
+        return Transcript(
+            self.text, self.speakers[turns], self.label_starts[turns],
+            self.content_starts[turns], self.ends[turns], self.timestamps[turns]
+        )
+
+    def speaker(self, i):
+        """Return the speaker name of turn i."""
+        return SPEAKERS[self.speakers[i]]
+
+    def content(self, i):
+        """Return what was said in turn i, without the label."""
+        return self.text[self.content_starts[i]:self.ends[i]].strip()
+
+    def raw(self, i):
+        """Return turn i as written, including its label."""
+        return self.text[self.label_starts[i]:self.ends[i]].strip()
+
+    def raw_length(self, i):
+        """Return the length of turn i including its label, without copying it."""
+        return self.ends[i] - self.label_starts[i]
+
+    def timestamp(self, i):
+        """Return the timestamp of turn i in seconds, or None."""
+        seconds = self.timestamps[i]
+        return None if seconds == NO_TIMESTAMP else seconds
+
+    def text_range(self, start, stop):
+        """Return turns start..stop-1 as written, in one slice of the original string."""
+        if start >= stop:
+            return ""
+        return self.text[self.label_starts[start]:self.ends[stop - 1]].strip()
+
+    def speaker_text(self, speaker):
+        """Return everything one speaker (an id) said, one turn per line."""
+        return "\n".join(
+            self.text[self.content_starts[i]:self.ends[i]]
+            for i, turn_speaker in enumerate(self.speakers) if turn_speaker == speaker
+        )
+
+    def turn_counts(self):
+        """Return the number of turns per speaker name."""
+        counts = dict.fromkeys(SPEAKERS, 0)
+        for speaker in self.speakers:
+            counts[SPEAKERS[speaker]] += 1
+        return counts
+
+
+def parse(text):
+    """Parse a transcript in one pass over its speaker labels."""
+    speakers = array("b")
+    label_starts = array("q")
+    content_starts = array("q")
+    ends = array("q")
+    timestamps = array("d")
+
+    for match in LABEL_PATTERN.finditer(text):
+        start = match.start()
+        if ends:
+            ends[-1] = start
+        elif start and not text[:start].isspace():
+            # Keep text before the first label as an unknown-speaker turn
+            speakers.append(UNKNOWN)
+            label_starts.append(0)
+            content_starts.append(0)
+            ends.append(start)
+            timestamps.append(NO_TIMESTAMP)
+
+        speakers.append(SALESPERSON if text[match.start("speaker")] in "sS" else CUSTOMER)
+        label_starts.append(start)
+        content_starts.append(match.end())
+        ends.append(len(text))
+        timestamp = match.group("before") or match.group("after")
+        timestamps.append(_seconds(timestamp) if timestamp else NO_TIMESTAMP)
+
+    if not speakers and text.strip():
+        speakers.append(UNKNOWN)
+        label_starts.append(0)
+        content_starts.append(0)
+        ends.append(len(text))
+        timestamps.append(NO_TIMESTAMP)
+
+    return Transcript(text, speakers, label_starts, content_starts, ends, timestamps)
+
+
+@lru_cache(maxsize=32)
+def parse_cached(text):
+    """Return parse(text), reusing the result for a conversation seen recently.
+
+    Lets chunking and fast analysis of the same request share one parse.
+    """
+    return parse(text)